@@ -14,53 +14,27 @@
 
 # Importing the libraries
 import os
+import time
+import pickle
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
-from openpyxl import load_workbook
-
-from Modulus.bravais_lattice_info import bravais
-from Modulus.units_info import convert
+try:
+    from scipy.optimize import minimize
+except ImportError:
+    minimize = None
+
+from Modulus.bravais_lattice_info import bravais_volume, cubic_ibrav
+from Modulus.SRO_kernel import obj_kernel, unit_factor
+from Modulus.SRO_exact import exact_case, exact_solve
+from Modulus.results_info import opt_results, add_run, add_global_best, add_sweep, write_xlsx, write_npz, \
+    load_results
 from Modulus.output_info import out_write
+from Modulus.telemetry_info import telemetry
 
 
-# Function required to append to XLSX file for pandas version < 1.4
-def append_df_to_excel(filename, df, sheet_name='Sheet1', startrow=None,
-                       truncate_sheet=False,
-                       **to_excel_kwargs):
-    if not os.path.isfile(filename):
-        df.to_excel(
-            filename,
-            sheet_name=sheet_name,
-            startrow=startrow if startrow is not None else 0,
-            **to_excel_kwargs)
-        return
-
-    if 'engine' in to_excel_kwargs:
-        to_excel_kwargs.pop('engine')
-
-    writer = pd.ExcelWriter(filename, engine='openpyxl', mode='a')
-
-    writer.book = load_workbook(filename)
-
-    if startrow is None and sheet_name in writer.book.sheetnames:
-        startrow = writer.book[sheet_name].max_row
-
-    if truncate_sheet and sheet_name in writer.book.sheetnames:
-        idx = writer.book.sheetnames.index(sheet_name)
-        writer.book.remove(writer.book.worksheets[idx])
-        writer.book.create_sheet(sheet_name, idx)
-
-    writer.sheets = {ws.title: ws for ws in writer.book.worksheets}
-
-    if startrow is None:
-        startrow = 0
-
-    df.to_excel(writer, sheet_name, startrow=startrow, **to_excel_kwargs)
-
-    writer.save()
-
-
-# Function to calculate the objectives during UAPSO
+# Function to calculate the objectives for a given beta_jm, the reference of the objective kernel
 def objectives(fileout, beta_list, inp_par, ext_data):
     obj = []
     obj_list = inp_par[10]
@@ -77,38 +51,16 @@ def objectives(fileout, beta_list, inp_par, ext_data):
 
         # Elastic energy terms
         if "Bulk modulus" in ext_data.columns:
-            tV0 = bravais(fileout, ext_data['Bravais'].iloc[0],
-                          np.array(ext_data.filter(regex=r'^Celldm', axis=1).iloc[0])).volume
+            tV = bravais_volume(fileout, ext_data['Bravais'], ext_data.filter(regex=r'^Celldm', axis=1))
+            tV0 = tV[0]
+            tV = tV[1:sub_num_sys + 1]
             tB0 = ext_data['Bulk modulus'].iloc[0]
-
-            tibrav = np.array(ext_data['Bravais'].iloc[1:sub_num_sys + 1])
-            tcelldm = np.array(ext_data.filter(regex=r'^Celldm', axis=1).iloc[1:sub_num_sys + 1])
-            tV = []
-            for i in range(sub_num_sys):
-                tV.append(bravais(fileout, tibrav[i], tcelldm[i]).volume)
             tB = ext_data['Bulk modulus'].iloc[1:sub_num_sys + 1]
-            tV = np.array(tV)
 
             DeltaUmj = beta_list * (np.abs(tV - tV0) * tB)
             DeltaUmj = pd.Series(DeltaUmj, index=DeltaGmj.index)
 
-            tconv = 1.0
-            if 'Bohr' in inp_par[5]:
-                tconv *= convert().a02m_3
-            elif 'Angstrom' in inp_par[5]:
-                tconv *= convert().A2m
-
-            if 'GPa' in inp_par[5]:
-                tconv *= 1.0e9
-            elif 'bar' in inp_par[5]:
-                tconv *= convert().bar2Pa
-
-            if 'eV' in inp_par[5]:
-                tconv *= convert().J2eV
-            elif 'Ha' in inp_par[5]:
-                tconv *= convert().Ha2J
-            elif 'Ry' in inp_par[5]:
-                tconv *= convert().Ry2J
+            tconv = unit_factor(inp_par)
 
             DeltaGmj = DeltaGmj + tconv * DeltaUmj
             G_norm_factor += sum(tconv * beta_list * (np.abs(tV - tV0) * tB))
@@ -121,18 +73,13 @@ def objectives(fileout, beta_list, inp_par, ext_data):
 
     if 2 in obj_list:
         DeltaSize = 0.0
-        if not ext_data['Bravais'].isin([4]).any():
+        if ext_data['Bravais'].isin(cubic_ibrav).all():
             tlat = (1.0 - (ext_data['Celldm 1'].iloc[1:sub_num_sys + 1] / ext_data['Celldm 1'].iloc[0]))
             DeltaSize = np.sqrt(np.sum(beta_list * tlat * tlat))
         else:
-            tV0 = bravais(fileout, ext_data['Bravais'].iloc[0],
-                          np.array(ext_data.filter(regex=r'^Celldm', axis=1).iloc[0])).volume
-            for i in range(sub_num_sys):
-                tcelldm = np.array(ext_data.filter(regex=r'^Celldm', axis=1).iloc[i + 1])
-                tibrav = ext_data['Bravais'].iloc[i + 1]
-                tV = bravais(fileout, tibrav, tcelldm).volume
-                DeltaSize += beta_list[i] * (1.0 - (tV / tV0)) * (1.0 - (tV / tV0))
-            DeltaSize = np.sqrt(DeltaSize)
+            tV = bravais_volume(fileout, ext_data['Bravais'], ext_data.filter(regex=r'^Celldm', axis=1))
+            tval = 1.0 - (tV[1:sub_num_sys + 1] / tV[0])
+            DeltaSize = np.sqrt(np.sum(beta_list * tval * tval))
         obj.append(DeltaSize)
 
     if 3 in obj_list:
@@ -182,42 +129,200 @@ def constraints(inp_par, ext_data):
     return beta_limits
 
 
-# Function to calculate the cost for given objectives
-def cost_func(fileout, obj, inp_par):
-    obj_weight_fixed = inp_par[11]
-    obj_weight = inp_par[12]
-
-    cost = 0.0
-    if obj_weight_fixed:
-        for i in range(len(obj)):
-            cost += obj_weight[i] * obj[i]
-    else:
-        out_write.error(fileout, 'On-fly objective weights are not implemented!')
-    return cost
-
-
-# Particle object
-class particle:
-
-    def __init__(self, fileout, inp_par, ext_data):
-        num_sub_sys = ext_data.shape[0] - 1
-        beta_limits = constraints(inp_par, ext_data)
+# Function to determine the composition key of a sub-system, independent of the order of the elements
+def composition_key(elements, frac):
+    return tuple(sorted([(elements[j], round(float(frac[j]), 3)) for j in range(len(elements)) if frac[j] > 1.0e-6]))
+
+
+# Function to collect the beta_jm of previous jobs (WarmStart), matching the sub-systems by composition or name,
+# returns a (n, num_sub_sys) matrix clipped to the beta limits, with NaN for the unmatched sub-systems, or None
+def prior_beta(fileout, inp_par, ext_data, kernel):
+    tfrac = np.array(ext_data[inp_par[2]].iloc[1:], dtype=float)
+    tkeys = [composition_key(inp_par[2], tfrac[j]) for j in range(kernel.num_sub_sys)]
+    prior = []
+    for file_name in inp_par[28]:
+        tprior = load_results(file_name)
+        tcomp = {composition_key(tprior['elements'], tprior['sub_frac'][j]): j
+                 for j in range(len(tprior['sub_names']))}
+        tname = {tprior['sub_names'][j]: j for j in range(len(tprior['sub_names']))}
+        tmatch = np.array([tcomp.get(tkeys[j], tname.get(kernel.sub_names[j], -1))
+                           for j in range(kernel.num_sub_sys)])
+        tnum = int(np.sum(tmatch >= 0))
+        out_write.misc(fileout, 4, 'Warm start from ' + file_name + ' : ', str(tnum) + ' of '
+                       + str(kernel.num_sub_sys) + ' sub-systems matched in ' + str(tprior['beta'].shape[0])
+                       + ' solutions')
+        if tnum > 0:
+            prior.append(np.where(tmatch >= 0, tprior['beta'][:, np.maximum(tmatch, 0)], np.nan))
+    if len(prior) == 0:
+        out_write.warning(fileout, 'No sub-system matched in the WarmStart files! Starting from random positions.')
+        return None
+    # NaN is kept for the unmatched sub-systems
+    return np.minimum(np.maximum(np.concatenate(prior), 0.0), kernel.search_limits)
+
+
+# Swarm object, storing the whole population as (pop_size, num_sub_sys) arrays
+class swarm:
+
+    def __init__(self, inp_par, kernel, seed_seq, warm=None, prior=None):
+        pop_size = inp_par[8]
+        num_sub_sys = kernel.num_sub_sys
+        beta_limits = kernel.search_limits
+
+        # Initial positions, velocities and personal bests from independent streams of the particles
+        trand = np.stack([np.random.default_rng(tseq).random((3, num_sub_sys))
+                          for tseq in seed_seq.spawn(pop_size)], axis=1)
+        if kernel.feasible is not None:
+            # Uniform positions and personal bests in the C1 box, projected onto the feasible set below
+            trand[[0, 2]] *= beta_limits
+
+        if prior is not None and warm is None:
+            # Seeding a fraction of the positions and personal bests (WarmFrac) with the prior beta_jm in turn,
+            # keeping the random values of the unmatched sub-systems
+            tnum = min(pop_size, max(1, int(round(inp_par[29] * pop_size))))
+            tprior = prior[np.arange(tnum) % prior.shape[0]]
+            trand[0, :tnum] = np.where(np.isnan(tprior), trand[0, :tnum], tprior)
+            trand[2, :tnum] = np.where(np.isnan(tprior), trand[2, :tnum], tprior)
 
-        self.position = np.random.random(num_sub_sys)
         # Enforcing position limits
-        self.position = np.maximum(self.position, np.zeros(num_sub_sys))
-        self.position = np.minimum(self.position, beta_limits)
-
-        self.velocity = np.random.random(num_sub_sys)
-        self.obj = objectives(fileout, self.position, inp_par, ext_data)
-        self.violation = np.maximum(np.zeros(num_sub_sys),
-                                    np.sign(self.position - beta_limits))
-        self.penalty = np.sum(self.violation) * 1.0
-        self.cost = cost_func(fileout, self.obj, inp_par) + self.penalty
-        self.feasible_sol = self.cost
-        self.evolutionary_factor = np.random.random(1)  # It is evolutionary feedback parameter
-        self.cognitive = np.random.random(1)
-        self.social = np.random.random(1)
+        self.position = kernel.project(trand[0])
+
+        self.velocity = trand[1]
+        self.violation = np.maximum(0.0, np.sign(self.position - beta_limits))
+        self.penalty = np.sum(self.violation, axis=1) * 1.0
+        self.cost = kernel.cost_batch(self.position)[1] + self.penalty
+        self.feasible_sol = self.cost.copy()
+
+        if warm is None:
+            # Personal bests of the particles are initialised independently of their positions
+            self.best_position = kernel.project(trand[2])
+            tviolation = np.maximum(0.0, np.sign(self.best_position - beta_limits))
+            self.best_obj, self.best_cost = kernel.cost_batch(self.best_position)
+            self.best_cost = self.best_cost + np.sum(tviolation, axis=1) * 1.0
+            self.num_eval = 2 * pop_size
+        else:
+            # Personal bests from the final swarm of the neighbouring weight vector, re-weighted without evaluation
+            self.best_position = warm[0].copy()
+            self.best_obj = warm[1].copy()
+            self.best_cost = self.best_obj @ kernel.obj_weight
+            self.num_eval = pop_size
+        # Particles whose personal bests follow them, after their first improvement
+        self.tracking = np.zeros(pop_size, dtype=bool)
+
+    # Function to update the whole swarm by one UAPSO iteration
+    def update(self, inp_par, kernel, global_best, iit, rng):
+        max_it = inp_par[7]
+        beta_limits = kernel.search_limits
+        c_min = 0.0
+        c_max = 4.0
+
+        # Determining the evolutionary factors
+        if global_best.cost > 0:
+            self.feasible_sol = np.where(self.penalty == 0.0, self.cost, self.feasible_sol)
+            evolutionary_factor = (self.best_cost - global_best.cost) / self.feasible_sol
+        elif global_best.cost < 0:
+            evolutionary_factor = self.best_cost / global_best.cost
+        else:
+            # A vanishing global best leaves no relative measure of the personal bests
+            evolutionary_factor = np.zeros(self.best_cost.shape[0])
+
+        # Determining the cognitive and social constants
+        tramp = (c_max - c_min) * (max_it - iit) / max_it
+        cognitive = np.where(evolutionary_factor <= 0.5, tramp + c_min,
+                             np.where(evolutionary_factor <= 1.0, c_max - tramp, 0.5 * (c_max + c_min)))
+        social = np.where(evolutionary_factor <= 0.5, c_max - tramp,
+                          np.where(evolutionary_factor <= 1.0, tramp + c_min, 0.5 * (c_max + c_min)))
+
+        evolutionary_factor = evolutionary_factor[:, None]
+        cognitive = cognitive[:, None]
+        social = social[:, None]
+        # Drawing the random numbers of the iteration in a single block
+        trand = rng.random((3,) + self.position.shape)
+
+        # Updating particle velocities
+            # Re-initializing zero velocities
+        self.velocity = self.velocity + (1.0 - np.sign(self.velocity)) * (1.0 + np.sign(self.velocity)) \
+                        * trand[0] * beta_limits
+        self.velocity = evolutionary_factor * self.velocity \
+                        + cognitive * trand[1] * (self.best_position - self.position) \
+                        + social * trand[2] * (global_best.beta - self.position) \
+                        - (1.0 - evolutionary_factor) * (global_best.beta - self.best_position)
+        # Keeping the velocities finite, large evolutionary factors (e.g. O1 = 1.0e5) would overflow them
+        self.velocity = np.clip(self.velocity, -1.0e6, 1.0e6)
+
+        # Updating positions
+        self.position = 0.3 * self.position + 0.7 * self.velocity
+        # Enforcing position limits
+        self.position = kernel.project(self.position)
+
+        # Evaluating cost and penalty, with the sign of the original per-particle loop, which counts the sub-systems
+        # below their limits and thereby keeps feasible_sol of the evolutionary factors at its initial value
+        self.violation = np.maximum(0.0, np.sign(beta_limits - self.position))
+        self.penalty = np.sum(self.violation, axis=1) * 1.0e5
+        tobj, self.cost = kernel.cost_batch(self.position)
+        self.num_eval += self.cost.shape[0]
+
+        # Updating personal bests, which follow the particles after their first improvement as in the original
+        # per-particle loop, or are kept as independent copies (IndependentBest = T)
+        timproved = self.cost < self.best_cost
+        if not inp_par[32]:
+            self.tracking = self.tracking | timproved
+            timproved = self.tracking
+        self.best_position[timproved] = self.position[timproved]
+        self.best_cost[timproved] = self.cost[timproved]
+        self.best_obj[timproved] = tobj[timproved]
+
+    # Function to update the global best from the personal bests, returns True on improvement
+    def update_global_best(self, global_best):
+        tind = np.argmin(self.best_cost)
+        if self.best_cost[tind] < global_best.cost:
+            global_best.beta = self.best_position[tind].copy()
+            global_best.cost = self.best_cost[tind]
+            return True
+        return False
+
+    # Function to calculate the swarm diameter, relative to the beta limits
+    def diameter(self, beta_limits):
+        tspan = np.max(self.position, axis=0) - np.min(self.position, axis=0)
+        return np.max(tspan / np.where(beta_limits > 0, beta_limits, 1.0))
+
+
+# Termination criteria object of a UAPSO run
+class termination:
+
+    def __init__(self, inp_par, kernel):
+        self.max_it = inp_par[7]
+        # The cost is non-negative for non-negative weights, a vanishing global best is then the minimum
+        self.zero_floor = bool(np.all(kernel.obj_weight >= 0))
+        self.stagnation_it = inp_par[15]
+        self.cost_tol = inp_par[16]
+        self.diameter_tol = inp_par[17]
+        self.max_eval = inp_par[18]
+        self.max_time = inp_par[19]
+        self.start_time = time.time()
+        self.stagnation = 0
+        self.reason = 'Maximum number of iterations (' + str(self.max_it) + ') reached'
+
+    # Function to check the criteria after an iteration, returns True if the run is to be terminated
+    def check(self, uapso_swarm, beta_limits, global_best, global_best_cost_pre):
+        # Iterations without a relative improvement of the global best larger than CostTol
+        if global_best_cost_pre - global_best.cost <= self.cost_tol * np.abs(global_best.cost):
+            self.stagnation += 1
+        else:
+            self.stagnation = 0
+
+        if self.zero_floor and global_best.cost == 0:
+            self.reason = 'Global best cost reached its minimum 0'
+        elif self.stagnation_it > 0 and self.stagnation >= self.stagnation_it:
+            self.reason = 'Global best was not updated in the last ' + str(self.stagnation_it) + ' iterations'
+        elif self.diameter_tol > 0 and uapso_swarm.diameter(beta_limits) < self.diameter_tol:
+            self.reason = 'Swarm diameter collapsed below ' + str(self.diameter_tol)
+        elif self.max_eval > 0 and uapso_swarm.num_eval >= self.max_eval:
+            self.reason = 'Maximum number of objective evaluations (' + str(self.max_eval) + ') reached'
+        elif self.max_time > 0 and time.time() - self.start_time >= self.max_time:
+            self.reason = 'Wall-clock budget (' + str(self.max_time) + ' s) exhausted'
+        else:
+            return False
+        return True
 
 
 # Optimized solution object
@@ -228,233 +333,400 @@ class opt_sol:
         self.cost = 1.0e10
 
 
-# Function to calculate the optimized figure of merits with SRO correction
-def fig_of_merit(fileout, beta_list, inp_par, ext_data):
-    fom = []
-    index = []
-    obj_list = inp_par[10]
-    sub_num_sys = ext_data.shape[0] - 1
-
-    if 1 in obj_list:
-
-        # Gibbs free energy terms
-        G0 = ext_data['Energy'].iloc[0]
-        DeltaGmj = beta_list * (ext_data['Energy'].iloc[1:sub_num_sys + 1] - G0)
-
-        # Elastic energy terms
-        tV0 = bravais(fileout, ext_data['Bravais'].iloc[0],
-                      np.array(ext_data.filter(regex=r'^Celldm', axis=1).iloc[0])).volume
-        tB0 = ext_data['Bulk modulus'].iloc[0]
-
-        if "Bulk modulus" in ext_data.columns:
-            DeltaUmj = []
-            for i in range(sub_num_sys):
-                tibrav = ext_data['Bravais'].iloc[i + 1]
-                tcelldm = np.array(ext_data.filter(regex=r'^Celldm', axis=1).iloc[i + 1])
-                tV = bravais(fileout, tibrav, tcelldm).volume
-                tB = ext_data['Bulk modulus'].iloc[i + 1]
-                DeltaUmj.append(beta_list[i] * (np.abs(tV - tV0) * tB))
-            DeltaUmj = pd.Series(DeltaUmj, index=DeltaGmj.index)
-
-            tconv = 1.0
-            if 'Bohr' in inp_par[5]:
-                tconv *= convert().a02m_3
-            elif 'Angstrom' in inp_par[5]:
-                tconv *= convert().A2m
-
-            if 'GPa' in inp_par[5]:
-                tconv *= 1.0e9
-            elif 'bar' in inp_par[5]:
-                tconv *= convert().bar2Pa
-
-            if 'eV' in inp_par[5]:
-                tconv *= convert().J2eV
-            elif 'Ha' in inp_par[5]:
-                tconv *= convert().Ha2J
-            elif 'Ry' in inp_par[5]:
-                tconv *= convert().Ry2J
-
-            DeltaGmj = DeltaGmj + tconv * DeltaUmj
-
-        G_SRO = np.sum(DeltaGmj)
-        fom.append(G_SRO)
-        index.append('G_SRO')
-
-    if 2 in obj_list:
-        DeltaSize = 0.0
-        if not ext_data['Bravais'].isin([4]).any():
-            tlat = (1.0 - (ext_data['Celldm 1'].iloc[1:sub_num_sys + 1] / ext_data['Celldm 1'].iloc[0]))
-            DeltaSize = np.sqrt(np.sum(beta_list * tlat * tlat))
-            index.append('Delta a')
-        else:
-            tV0 = bravais(fileout, ext_data['Bravais'].iloc[0],
-                          np.array(ext_data.filter(regex=r'^Celldm', axis=1).iloc[0])).volume
-            for i in range(sub_num_sys):
-                tcelldm = np.array(ext_data.filter(regex=r'^Celldm', axis=1).iloc[i + 1])
-                tibrav = ext_data['Bravais'].iloc[i+1]
-                tV = bravais(fileout, tibrav, tcelldm).volume
-                DeltaSize += beta_list[i] * (1.0 - (tV / tV0)) * (1.0 - (tV / tV0))
-            DeltaSize = np.sqrt(DeltaSize)
-            index.append('Delta V')
-        fom.append(DeltaSize)
-
-    if 3 in obj_list:
-        tval = (1.0 - (ext_data['VEC'].iloc[1:sub_num_sys + 1] / ext_data['VEC'].iloc[0]))
-        DeltaVEC = np.sqrt(np.sum(beta_list * tval * tval))
-        fom.append(DeltaVEC)
-        index.append('Delta VEC')
-
-    if 4 in obj_list:
-        tval = (1.0 - (ext_data['Electronegativity'].iloc[1:sub_num_sys + 1] / ext_data['Electronegativity'].iloc[0]))
-        DeltaChi = np.sqrt(np.sum(beta_list * tval * tval))
-        fom.append(DeltaChi)
-        index.append('Delta Chi')
-
-    return fom, index
-
-
-# Main function for UAPSO
-def UAPSO(fileout, inp_par, ext_data):
-    # Simulations parameters from the input parameters
-    max_run = inp_par[6]
+# Global best history object, recording the improvements of a run in geometrically growing buffers
+class opt_history:
+
+    def __init__(self, num_sub_sys, capacity=64):
+        self.size = 0
+        self.iteration = np.empty(capacity, dtype=np.int64)
+        self.beta = np.empty((capacity, num_sub_sys))
+        self.cost = np.empty(capacity)
+        self.fom = None
+        self.fom_index = None
+
+    # Function to record an improved global best at the iteration iit
+    def record(self, iit, beta, cost):
+        if self.size == self.cost.shape[0]:
+            self.iteration = self.grow(self.iteration)
+            self.beta = self.grow(self.beta)
+            self.cost = self.grow(self.cost)
+        self.iteration[self.size] = iit
+        self.beta[self.size] = beta
+        self.cost[self.size] = cost
+        self.size += 1
+
+    def grow(self, tbuf):
+        tnew = np.empty((2 * tbuf.shape[0],) + tbuf.shape[1:], dtype=tbuf.dtype)
+        tnew[:self.size] = tbuf[:self.size]
+        return tnew
+
+    # Function to trim the buffers and to calculate the figure of merits at the end of a run
+    def finalize(self, kernel):
+        self.iteration = self.iteration[:self.size].copy()
+        self.beta = self.beta[:self.size].copy()
+        self.cost = self.cost[:self.size].copy()
+        self.fom, self.fom_index = kernel.fig_of_merit_batch(self.beta)
+
+
+# Function to save a checkpoint atomically
+def save_checkpoint(file_name, state):
+    with open(file_name + '.tmp', 'wb') as fp:
+        pickle.dump(state, fp, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(file_name + '.tmp', file_name)
+
+
+# Function to load a checkpoint
+def load_checkpoint(file_name):
+    with open(file_name, 'rb') as fp:
+        return pickle.load(fp)
+
+
+# Function to polish the global best of a run by L-BFGS-B with analytic gradients within the beta limits,
+# returns the number of iterations
+def polish(kernel, global_best):
+    tres = minimize(kernel.cost_gradient, global_best.beta, jac=True, method='L-BFGS-B',
+                    bounds=list(zip(np.zeros(kernel.num_sub_sys), kernel.search_limits)),
+                    options={'maxiter': 1000, 'ftol': 1.0e-15, 'gtol': 1.0e-12})
+    # The sums of the feasible set are not bounds of L-BFGS-B, the polished beta_jm is projected onto it
+    tbeta = kernel.project(tres.x)[0]
+    tcost = kernel.cost(tbeta)
+    if tcost < global_best.cost:
+        global_best.beta = tbeta
+        global_best.cost = tcost
+    return tres.nit, tres.nfev
+
+
+# Function to perform a single, independent UAPSO run with its own random number generator
+def UAPSO_run(fileout, inp_par, kernel, irun, seed_seq, resume=False, warm=None, chk_tag='', prior=None):
     max_it = inp_par[7]
-    pop_size = inp_par[8]
-    num_sub_sys = ext_data.shape[0] - 1
-    beta_limits = constraints(inp_par, ext_data)
-    c_min = 0.0
-    c_max = 4.0
-
-    # Writing initial information into the output XLSX file
-    file_name = inp_par[1] + '.xlsx'
-    header = ext_data[['Name'] + inp_par[2] + ['Energy']].iloc[0:1]
-    header.rename(columns={'Name': 'System'}, inplace=True)
-    header.to_excel(file_name, sheet_name='Global best', index=None, float_format="%.4f", startrow=0, startcol=0)
-
-    # Starting optimization runs
-    global_best_run = opt_sol()  # Absolute global best after all runs
-
-    for irun in range(max_run):
+    chk_every = inp_par[23]
+    chk_run = inp_par[1] + '.chk' + os.sep + chk_tag + 'run' + str(irun + 1)
+
+    # Restoring a completed run from its checkpoint
+    if resume and os.path.isfile(chk_run + '.done'):
+        out_write.misc(fileout, 2, '\n Run ', str(irun + 1) + ' ... ')
+        out_write.misc(fileout, 8, 'Restored the completed run from its checkpoint')
+        return load_checkpoint(chk_run + '.done')
+
+    out_write.misc(fileout, 2, '\n Run ', str(irun + 1) + ' ... ')
+    out_write.misc(fileout, 8, 'Seed : ', str(seed_seq.entropy) + ', spawn key ' + str(seed_seq.spawn_key))
+    uapso_stop = termination(inp_par, kernel)
+    if resume and os.path.isfile(chk_run + '.pkl'):
+        # Continuing the run from the state of its last checkpoint
+        state = load_checkpoint(chk_run + '.pkl')
+        rng = np.random.default_rng()
+        rng.bit_generator.state = state['rng']
+        uapso_swarm = state['swarm']
+        global_best = state['global_best']
+        global_best_history = state['history']
+        uapso_stop.stagnation = state['stagnation']
+        uapso_stop.start_time -= state['elapsed']
+        iit_start = state['iit']
+        num_improved = state.get('improvements', 0)
+        out_write.misc(fileout, 8, 'Resumed from the checkpoint at iteration ', str(iit_start))
+    else:
+        rng = np.random.default_rng(seed_seq)
 
         global_best = opt_sol()  # Global best after iterations of the current run
 
         # Recording the global best through iterations for the current run if OptHistory = T
+        global_best_history = None
         if inp_par[9]:
-            global_best_history_beta = pd.DataFrame()
+            global_best_history = opt_history(kernel.num_sub_sys)
 
         # Initialising the swarm for the current run
-        out_write.iter(fileout, 2, '\n Run ', irun + 1, ' ... ')
-        swarm = []
-        swarm_best = []
-        for ipop in range(pop_size):
-            swarm.append(particle(fileout, inp_par, ext_data))
-            swarm_best.append(particle(fileout, inp_par, ext_data))
-            if swarm_best[ipop].cost < global_best.cost:
-                global_best.beta = swarm_best[ipop].position
-                global_best.cost = swarm_best[ipop].cost
-        out_write.misc(fileout, 8, 'Initialization ')
-
-        # Starting  optimization iteration for the current run
-        max_it_reset = 0
-        for iit in range(max_it):
-            global_best_cost_pre = global_best.cost
-            # Iterating over population
-            for ipop in range(pop_size):
-                # Determining the evolutionary factor
-                if global_best.cost > 0:
-                    if swarm[ipop].penalty == 0.0:
-                        swarm[ipop].feasible_sol = swarm[ipop].cost
-                    swarm[ipop].evolutionary_factor = (swarm_best[ipop].cost - global_best.cost) / swarm[
-                        ipop].feasible_sol
-                else:
-                    swarm[ipop].evolutionary_factor = swarm_best[ipop].cost / global_best.cost
-
-                # Determining the cognitive and social constants
-                if swarm[ipop].evolutionary_factor <= 0.5:
-                    swarm[ipop].cognitive = ((c_max - c_min) * (max_it - iit) / max_it) + c_min
-                    swarm[ipop].social = c_max - ((c_max - c_min) * (max_it - iit) / max_it)
-                elif swarm[ipop].evolutionary_factor > 0.5 and swarm[ipop].evolutionary_factor <= 1.0:
-                    swarm[ipop].cognitive = c_max - ((c_max - c_min) * (max_it - iit) / max_it)
-                    swarm[ipop].social = ((c_max - c_min) * (max_it - iit) / max_it) + c_min
-                else:
-                    swarm[ipop].cognitive = 0.5 * (c_max + c_min)
-                    swarm[ipop].social = 0.5 * (c_max + c_min)
-
-                # Updating particle velocities
-                    # Re-initializing zero velocities
-                swarm[ipop].velocity = swarm[ipop].velocity +\
-                                          (1.0 - np.sign(swarm[ipop].velocity)) \
-                                        * (1.0 + np.sign(swarm[ipop].velocity)) \
-                                        * np.random.random(num_sub_sys) * beta_limits
-                swarm[ipop].velocity = swarm[ipop].evolutionary_factor * swarm[ipop].velocity \
-                                       + swarm[ipop].cognitive * np.random.random(num_sub_sys) \
-                                       * (swarm_best[ipop].position - swarm[ipop].position) \
-                                       + swarm[ipop].social * np.random.random(num_sub_sys) \
-                                       * (global_best.beta - swarm[ipop].position) \
-                                       - (1.0 - swarm[ipop].evolutionary_factor) \
-                                       * (global_best.beta - swarm_best[ipop].position)
-                # Enforcing velocity limits
-                #swarm[ipop].velocity = np.maximum(swarm[ipop].velocity, np.zeros(num_sub_sys))
-                #swarm[ipop].velocity = np.minimum(swarm[ipop].velocity, beta_limits)
-
-                # Updating position
-                swarm[ipop].position = 0.3 * swarm[ipop].position + 0.7 * swarm[ipop].velocity
-                # Enforcing position limits
-                swarm[ipop].position = np.maximum(swarm[ipop].position, np.zeros(num_sub_sys))
-                swarm[ipop].position = np.minimum(swarm[ipop].position, beta_limits)
-
-                # Evaluating cost and penalty
-                swarm[ipop].obj = objectives(fileout, swarm[ipop].position, inp_par, ext_data)
-                swarm[ipop].violation = np.maximum(np.zeros(num_sub_sys),
-                                                   np.sign(beta_limits - swarm[ipop].position))
-                swarm[ipop].penalty = np.sum(swarm[ipop].violation) * 1.0e5
-                swarm[ipop].cost = cost_func(fileout, swarm[ipop].obj, inp_par)
-
-                # Updating swarm best
-                if swarm[ipop].cost < swarm_best[ipop].cost:
-                    swarm_best[ipop] = swarm[ipop]
-
-                # Updating global best for the current run
-                if swarm_best[ipop].cost < global_best.cost:
-                    global_best.beta = swarm_best[ipop].position
-                    global_best.cost = swarm_best[ipop].cost
-                    max_it_reset = 0
-                    # Recording global best instances for the current run
-                    if inp_par[9]:
-                        tfom, tindex = fig_of_merit(fileout, global_best.beta, inp_par, ext_data)
-                        tser = pd.Series(global_best.beta, index=ext_data['Name'].iloc[1:num_sub_sys + 1])
-                        tser = tser.append(pd.Series(tfom, index=tindex))
-                        global_best_history_beta['Ite ' + str(iit + 1)] = tser
-
-            if global_best.cost == global_best_cost_pre:
-                max_it_reset += 1
+        tstart = time.perf_counter()
+        uapso_swarm = swarm(inp_par, kernel, seed_seq, warm, prior)
+        uapso_swarm.update_global_best(global_best)
+        telemetry.add('Swarm initialisation', time.perf_counter() - tstart)
+        iit_start = 0
+        num_improved = 0
+        if warm is not None:
+            out_write.misc(fileout, 8, 'Initialization from the neighbouring weight vector')
+        elif prior is not None:
+            out_write.misc(fileout, 8, 'Initialization from ', str(prior.shape[0]) + ' prior solutions')
+        else:
+            out_write.misc(fileout, 8, 'Initialization ')
+
+    # Wall times of the iteration steps, added to the telemetry at the end of the run
+    tupdate = 0.0
+    tbest = 0.0
+    tlog = 0.0
+    tcheck = 0.0
+
+    # Starting  optimization iteration for the current run
+    iit = iit_start - 1
+    for iit in range(iit_start, max_it):
+        global_best_cost_pre = global_best.cost
+        # Updating the whole population at once
+        t0 = time.perf_counter()
+        uapso_swarm.update(inp_par, kernel, global_best, iit, rng)
+
+        # Updating global best for the current run
+        t1 = time.perf_counter()
+        improved = uapso_swarm.update_global_best(global_best)
+        if improved:
+            num_improved += 1
+            # Recording global best instances for the current run
+            if inp_par[9]:
+                global_best_history.record(iit, global_best.beta, global_best.cost)
+
+        t2 = time.perf_counter()
+        if out_write.log_iter(iit, improved):
+            out_write.iter(fileout, 10, 'Iteration ', iit + 1, ' --> Global Lowest Cost : ' + str(global_best.cost))
+        t3 = time.perf_counter()
+        tupdate += t1 - t0
+        tbest += t2 - t1
+        tlog += t3 - t2
+
+        # Breaking the iteration, if any of the termination criteria is satisfied
+        stop = uapso_stop.check(uapso_swarm, kernel.search_limits, global_best, global_best_cost_pre)
+        telemetry.trace(irun, iit, time.time() - uapso_stop.start_time, uapso_swarm.num_eval, global_best.cost,
+                        uapso_swarm.cost, uapso_swarm.diameter(kernel.search_limits) if telemetry.enabled else 0.0,
+                        improved, uapso_stop.stagnation)
+        if stop:
+            break
+
+        # Saving the full state of the run every chk_every iterations
+        if chk_every > 0 and (iit + 1) % chk_every == 0 and iit + 1 < max_it:
+            t4 = time.perf_counter()
+            save_checkpoint(chk_run + '.pkl', {'rng': rng.bit_generator.state, 'swarm': uapso_swarm,
+                                               'global_best': global_best, 'history': global_best_history,
+                                               'stagnation': uapso_stop.stagnation,
+                                               'elapsed': time.time() - uapso_stop.start_time,
+                                               'iit': iit + 1, 'improvements': num_improved})
+            tcheck += time.perf_counter() - t4
+    tnum_iter = iit + 1 - iit_start
+    telemetry.add('Swarm updates and objectives', tupdate, tnum_iter)
+    telemetry.add('Global best and history', tbest, tnum_iter)
+    telemetry.add('Iteration logging', tlog, tnum_iter)
+    if chk_every > 0:
+        telemetry.add('Checkpoints', tcheck)
+    telemetry.run_end(irun, iit + 1, uapso_swarm.num_eval, num_improved, time.time() - uapso_stop.start_time,
+                      uapso_stop.reason)
+
+    out_write.misc(fileout, 8, 'Termination : ', uapso_stop.reason + ' after ' + str(iit + 1) + ' iterations and '
+                   + str(uapso_swarm.num_eval) + ' objective evaluations')
+
+    # Polishing the global best of the run, recorded as the iteration after the last one if improved
+    if inp_par[27] and minimize is not None:
+        tstart = time.perf_counter()
+        tcost = global_best.cost
+        tnit, tnfev = polish(kernel, global_best)
+        telemetry.add('Polishing', time.perf_counter() - tstart)
+        out_write.misc(fileout, 8, 'Polishing : ', 'Global Lowest Cost ' + str(tcost) + ' --> ' + str(global_best.cost)
+                       + ' in ' + str(tnit) + ' L-BFGS-B iterations and ' + str(tnfev) + ' evaluations')
+        if inp_par[9] and global_best.cost < tcost:
+            global_best_history.record(iit + 1, global_best.beta, global_best.cost)
+
+    if inp_par[9]:
+        tstart = time.perf_counter()
+        global_best_history.finalize(kernel)
+        telemetry.add('Figure of merits of the history', time.perf_counter() - tstart)
+
+    # Keeping the final personal bests and their objectives to warm-start the next weight vector of a sweep
+    if not inp_par[11]:
+        global_best.archive = (uapso_swarm.best_position, uapso_swarm.best_obj)
+
+    # Saving the completed run, which replaces its last checkpoint
+    if chk_every > 0:
+        save_checkpoint(chk_run + '.done', (global_best, global_best_history))
+        if os.path.isfile(chk_run + '.pkl'):
+            os.remove(chk_run + '.pkl')
+
+    return global_best, global_best_history
+
+
+# Function to perform a UAPSO run in a worker process, writing its output into a separate file
+def UAPSO_run_worker(fileout, inp_par, kernel, irun, seed_seq, resume=False, warm=None, chk_tag='', prior=None):
+    fileout_run = fileout + '.run' + str(irun + 1)
+    open(fileout_run, "w").close()
+    out_write.settings(inp_par[20], inp_par[21])
+    # The trace lines of the workers are appended to the trace of the job
+    telemetry.settings(inp_par[25], inp_par[1] + '.trace.jsonl' if inp_par[25] else None, "a")
+    run_result = UAPSO_run(fileout_run, inp_par, kernel, irun, seed_seq, resume, warm, chk_tag, prior)
+    out_write.close(fileout_run)
+    telemetry.close()
+    return run_result + (telemetry.collect(),)
+
+
+# Function to solve the objectives exactly as a single run, returns None if the exact solver fails
+def exact_run(fileout, inp_par, kernel, case):
+    out_write.misc(fileout, 2, 'Solver : Exact (' + case + ')')
+    out_write.misc(fileout, 2, '\n Run ', '1 ... ')
+    tstart = time.time()
+    iterates = exact_solve(fileout, kernel, case)
+    if iterates is None:
+        return None
+
+    global_best = opt_sol()
+    global_best_history = None
+    if inp_par[9]:
+        global_best_history = opt_history(kernel.num_sub_sys)
+    tcost = kernel.cost_batch(np.array(iterates))[1]
+    # The exact solution is never worse than beta = 0, which is in the box of beta limits
+    tcost_zero = kernel.cost_batch(np.zeros((1, kernel.num_sub_sys)))[1][0]
+    if np.min(tcost) > tcost_zero + 1.0e-12 * max(abs(tcost_zero), 1.0):
+        out_write.warning(fileout, 'Exact solution is worse than beta = 0! Falling back to UAPSO.')
+        return None
+    num_improved = 0
+    for iit in range(len(iterates)):
+        if tcost[iit] < global_best.cost:
+            global_best.beta = iterates[iit].copy()
+            global_best.cost = tcost[iit]
+            num_improved += 1
+            if inp_par[9]:
+                global_best_history.record(iit, global_best.beta, global_best.cost)
             out_write.iter(fileout, 10, 'Iteration ', iit + 1, ' --> Global Lowest Cost : ' + str(global_best.cost))
+    out_write.misc(fileout, 8, 'Termination : ', 'Exact solution after ' + str(len(iterates)) + ' iterations and '
+                   + str(len(iterates)) + ' objective evaluations')
 
-            # Breaking the iteration, if the global best of the current run does not change for 200 iteration
-            if max_it_reset != 0 and max_it_reset % 200 == 0:
-                out_write.misc(fileout, 8, 'WARNING: Global best was not updated in the last 200 iterations! '
-                                           'UAPSO cycle for this run is terminated!')
-                #break
+    if inp_par[9]:
+        global_best_history.finalize(kernel)
+    telemetry.add('Exact solver', time.time() - tstart)
+    telemetry.run_end(0, len(iterates), len(iterates), num_improved, time.time() - tstart, 'Exact solution')
+    return global_best, global_best_history
 
-        # Writing the global best history for the current run into the XLSX file
-        if inp_par[9]:
-            append_df_to_excel(file_name, global_best_history_beta, sheet_name='Beta in run ' + str(irun + 1),
-                               startrow=0, float_format="%.4f")
 
-        # Updating the absolute global best
-        if global_best.cost < global_best_run.cost:
-            global_best_run = global_best
+# Function to write the absolute global best (if given) and the collected results into the output files
+def write_results(fileout, inp_par, kernel, results, global_best_run):
+    if global_best_run is not None:
+        fom_final, fom_index = kernel.fig_of_merit(global_best_run.beta)
+        add_global_best(results, global_best_run, fom_final, fom_index)
 
-    # Writing the absolute global best into the XLSX file
     out_write.misc(fileout, 0, '\n')
-    out_write.misc(fileout, 0, 'Writing the final solution in ' + inp_par[1] + '.xlsx ...')
-
-    final_data = ext_data[['Name'] + inp_par[2] + ['Energy']].iloc[1:num_sub_sys + 1]
-    final_data.rename(columns={'Name': 'Sub-system'}, inplace=True)
-    final_data['Beta limits'] = pd.Series(beta_limits, index=ext_data.index[1:num_sub_sys + 1])
-    final_data['Beta_jm'] = pd.Series(global_best_run.beta, index=ext_data.index[1:num_sub_sys + 1])
-    append_df_to_excel(file_name, final_data, sheet_name='Global best',
-                       startrow=3, index=None, float_format="%.4f")
-    fom_final, fom_index = fig_of_merit(fileout, global_best_run.beta, inp_par, ext_data)
-    fom_final = pd.Series(fom_final, name='FoM', index=fom_index)
-    append_df_to_excel(file_name, fom_final, sheet_name='Global best',
-                       startrow=num_sub_sys + 5, startcol=0, float_format="%.4f")
+    if inp_par[22] in ['XLSX', 'Both']:
+        out_write.misc(fileout, 0, 'Writing the final solution in ' + inp_par[1] + '.xlsx ...')
+        tstart = time.perf_counter()
+        write_xlsx(results, inp_par[1] + '.xlsx')
+        telemetry.add('XLSX output', time.perf_counter() - tstart)
+    if inp_par[22] in ['NPZ', 'Both']:
+        out_write.misc(fileout, 0, 'Writing the final solution in ' + inp_par[1] + '.npz ...')
+        tstart = time.perf_counter()
+        write_npz(results, inp_par[1] + '.npz')
+        telemetry.add('NPZ output', time.perf_counter() - tstart)
+
+
+# Main function for UAPSO
+def UAPSO(fileout, inp_par, ext_data, resume=False):
+    # Simulations parameters from the input parameters
+    max_run = inp_par[6]
+    num_jobs = min(inp_par[14], max_run)
+    tstart = time.perf_counter()
+    beta_limits = constraints(inp_par, ext_data)
+    kernel = obj_kernel(fileout, inp_par, ext_data, beta_limits)
+    telemetry.add('Constraints and objective kernel', time.perf_counter() - tstart)
+
+    # Weight vectors of the objectives, optimized one after another in a weight sweep (FixedObjWeight = F)
+    sweep = not inp_par[11]
+    num_weight = kernel.obj_weights.shape[0]
+    if sweep:
+        out_write.misc(fileout, 2, 'Weight sweep over ', str(num_weight) + ' weight vectors')
+        if inp_par[26] == 'Exact':
+            out_write.warning(fileout, 'The exact solver is not used in weight sweeps! Falling back to UAPSO.')
+
+    # Solving the objectives exactly if their structure allows it (Solver = Exact/Auto), or falling back to UAPSO
+    elif inp_par[26] != 'UAPSO':
+        tcase = exact_case(kernel)
+        # The Dinkelbach method solves O1 in the box of beta limits, not in the projected feasible set
+        if tcase == 'Fractional' and kernel.feasible is not None:
+            tcase = None
+        if tcase is not None:
+            run_result = exact_run(fileout, inp_par, kernel, tcase)
+            if run_result is not None:
+                results = opt_results(inp_par, ext_data, kernel, '', 1)
+                add_run(results, 0, run_result[0], run_result[1])
+                write_results(fileout, inp_par, kernel, results, run_result[0])
+                return
+        if inp_par[26] == 'Exact':
+            out_write.warning(fileout, 'The objectives cannot be solved exactly! Falling back to UAPSO.')
+        out_write.misc(fileout, 2, 'Solver : UAPSO')
+
+    # Prior solutions of related jobs to seed the swarms (WarmStart)
+    prior = None
+    if inp_par[28] is not None:
+        prior = prior_beta(fileout, inp_par, ext_data, kernel)
+
+    if inp_par[27] and minimize is None:
+        out_write.warning(fileout, 'Polish requires SciPy! The global bests are not polished.')
+
+    # Independent seed sequences of the runs, spawned from the recorded root entropy (Seed)
+    chk_dir = inp_par[1] + '.chk'
+    if resume and os.path.isfile(chk_dir + os.sep + 'job.pkl'):
+        seed_entropy = load_checkpoint(chk_dir + os.sep + 'job.pkl')
+        out_write.misc(fileout, 2, 'Resuming from the checkpoints in ', chk_dir)
+    else:
+        if resume:
+            out_write.warning(fileout, 'No checkpoint found in ' + chk_dir + '! Starting from scratch.')
+            resume = False
+        seed_entropy = np.random.SeedSequence(inp_par[24]).entropy
+        if inp_par[23] > 0:
+            os.makedirs(chk_dir, exist_ok=True)
+            save_checkpoint(chk_dir + os.sep + 'job.pkl', seed_entropy)
+    if sweep:
+        seeds_weight = [tseq.spawn(max_run) for tseq in np.random.SeedSequence(seed_entropy).spawn(num_weight)]
+    else:
+        seeds_weight = [np.random.SeedSequence(seed_entropy).spawn(max_run)]
+    out_write.misc(fileout, 2, 'Root seed entropy : ', str(seed_entropy))
+
+    # Collecting the results of the runs at full precision
+    results = opt_results(inp_par, ext_data, kernel, seed_entropy, num_weight * max_run)
+
+    # Starting optimization runs, serially or in a process pool
+    tstart = time.perf_counter()
+    if num_jobs > 1:
+        out_write.misc(fileout, 2, 'Parallel runs on ', str(num_jobs) + ' processes')
+        pool = ProcessPoolExecutor(max_workers=num_jobs)
+
+    warm = [None] * max_run
+    for iweight in range(num_weight):
+        kernel.obj_weight = kernel.obj_weights[iweight]
+        seeds = seeds_weight[iweight]
+        chk_tag = ''
+        if sweep:
+            chk_tag = 'weight' + str(iweight + 1)
+            out_write.misc(fileout, 2, '\n Weight vector ' + str(iweight + 1) + ' : ', str(list(kernel.obj_weight)))
+
+        if num_jobs == 1:
+            run_results = (UAPSO_run(fileout, inp_par, kernel, irun, seeds[irun], resume, warm[irun], chk_tag,
+                                     prior) for irun in range(max_run))
+        else:
+            run_results = pool.map(UAPSO_run_worker, [fileout] * max_run, [inp_par] * max_run,
+                                   [kernel] * max_run, range(max_run), seeds, [resume] * max_run,
+                                   warm, [chk_tag] * max_run, [prior] * max_run)
+
+        # Merging the runs in run order
+        global_best_run = opt_sol()  # Absolute global best after all runs
+        for irun, run_result in enumerate(run_results):
+            global_best, global_best_history = run_result[:2]
+
+            if num_jobs > 1:
+                fileout_run = fileout + '.run' + str(irun + 1)
+                out_write.append(fileout, fileout_run)
+                os.remove(fileout_run)
+                telemetry.merge(run_result[2])
+
+            add_run(results, iweight * max_run + irun, global_best, global_best_history)
+            if sweep:
+                warm[irun] = global_best.archive
+
+            # Updating the absolute global best
+            if global_best.cost < global_best_run.cost:
+                global_best_run = global_best
+
+        # Recording the best beta_jm of the weight vector
+        if sweep:
+            fom, fom_index = kernel.fig_of_merit(global_best_run.beta)
+            add_sweep(results, iweight, global_best_run, kernel.objectives(global_best_run.beta), fom, fom_index)
+            out_write.misc(fileout, 4, 'Best cost of the weight vector : ', str(global_best_run.cost))
+
+    if num_jobs > 1:
+        pool.shutdown()
+    telemetry.add('Optimization runs (wall)', time.perf_counter() - tstart)
+
+    # Writing the absolute global best into the output files, or the best of each weight vector of a sweep
+    write_results(fileout, inp_par, kernel, results, global_best_run if not sweep else None)
+
+    # Removing the checkpoints of the completed job
+    if os.path.isdir(chk_dir):
+        shutil.rmtree(chk_dir)
@@ -0,0 +1,197 @@
+# =============================================================================#
+#                                                                              #
+#           The feasible set module for the short-ranged ordering              #
+#           correction                                                         #
+#                                                                              #
+# -----------------------------------------------------------------------------#
+# This module projects sets of beta_jm onto the feasible set of the            #
+# constraints, the C1 box and the C2/C3 sums, for the whole swarm at once.     #
+# -----------------------------------------------------------------------------#
+# Original version: March 2022 by Okan K. Orhan                                #
+# =============================================================================#
+
+
+# !/bin/python3
+
+# Importing the libraries
+import numpy as np
+
+
+# Feasible set object, 0 <= beta <= upper (C1) and a * beta <= c for each element (C2) and the total (C3)
+class feasible_set:
+
+    def __init__(self, inp_par, ext_data, max_it=200, tol=1.0e-10):
+        cons_ind = inp_par[13]
+        num_sub_sys = ext_data.shape[0] - 1
+        self.max_it = max_it
+        self.tol = tol
+
+        # C1 : beta_j <= 1 / (m M), m elements in the sub-system j out of M principal elements
+        tM = len(inp_par[2])
+        tfrac = np.array(ext_data[inp_par[2]].iloc[1:], dtype=float)
+        self.upper = np.ones(num_sub_sys)
+        if 1 in cons_ind:
+            self.upper = np.minimum(1.0, 1.0 / (np.count_nonzero(tfrac, axis=1) * tM))
+
+        # C2 : sum_j beta_j x_jm <= x_m for each principal element m, C3 : sum_j beta_j <= 1
+        ta = np.zeros((0, num_sub_sys))
+        tc = np.zeros(0)
+        if 2 in cons_ind:
+            ta = np.concatenate([ta, tfrac.T])
+            tc = np.concatenate([tc, np.array(inp_par[3], dtype=float)])
+        if 3 in cons_ind:
+            ta = np.concatenate([ta, np.ones((1, num_sub_sys))])
+            tc = np.concatenate([tc, [1.0]])
+        tind = np.sum(ta * ta, axis=1) > 0
+        self.a = ta[tind]
+        self.c = tc[tind]
+        self.a_norm_sq = np.sum(self.a * self.a, axis=1)
+
+    # Function to find the infeasible rows of a matrix of beta_jm in the box
+    def infeasible(self, beta_matrix):
+        return np.any(beta_matrix @ self.a.T > self.c * (1.0 + self.tol), axis=1)
+
+    # Function to evaluate the primal rows of the dual of the projection of the rows of tz for the multipliers of the
+    # sums, returns the unclipped and the clipped rows, and the dual gradients
+    def dual(self, tz, tlam):
+        ty = tz - tlam @ self.a
+        tx = np.minimum(np.maximum(ty, 0.0), self.upper)
+        return ty, tx, tx @ self.a.T - self.c
+
+    # Function to maximize the dual exactly along the directions tdir from the multipliers tlam, the slope of the
+    # piecewise quadratic dual being piecewise linear, changing its rate where the sub-systems reach their bounds
+    def line(self, tz, tlam, tdir):
+        trow = np.arange(tz.shape[0])[:, None]
+        ty = tz - tlam @ self.a
+        tw = tdir @ self.a
+        tw_sq = tw * tw
+        with np.errstate(divide='ignore'):
+            tmax = np.min(np.where(tdir < 0.0, -tlam / np.minimum(tdir, -1.0e-300), np.inf), axis=1)
+            tinv = np.where(tw != 0.0, 1.0 / tw, 0.0)
+        tlow = ty * tinv
+        thigh = (ty - self.upper) * tinv
+        tlow, thigh = np.minimum(tlow, thigh), np.maximum(tlow, thigh)
+
+        # Slope and its rate at zero, the sub-systems free between their two breaks
+        tslope0 = np.sum(tw * np.minimum(np.maximum(ty, 0.0), self.upper), axis=1) - tdir @ self.c
+        trate0 = -np.sum(tw_sq * ((tlow <= 0.0) & (thigh > 0.0)), axis=1)
+
+        # Slopes at the positive breaks in order, the rates changing by -w^2 at the low and +w^2 at the high breaks
+        tt = np.concatenate([tlow, thigh], axis=1)
+        tchange = np.concatenate([-tw_sq, tw_sq], axis=1) * (tt > 0.0)
+        tt = np.maximum(tt, 0.0)
+        tord = np.argsort(tt, axis=1)
+        tt = tt[trow, tord]
+        trate = trate0[:, None] + np.cumsum(tchange[trow, tord], axis=1)
+        tstep = np.diff(tt, axis=1, prepend=0.0)
+        tstep[:, 1:] *= trate[:, :-1]
+        tstep[:, 0] *= trate0
+        tslope = tslope0[:, None] + np.cumsum(tstep, axis=1)
+
+        # Step at the first sign change of the slope, or along the last rate, limited by the multipliers
+        tind = np.where(np.any(tslope <= 0.0, axis=1), np.argmax(tslope <= 0.0, axis=1), tt.shape[1])[:, None]
+        tpre = np.maximum(tind - 1, 0)
+        tt_pre = np.where(tind > 0, tt[trow, tpre], 0.0)[:, 0]
+        tslope_pre = np.where(tind > 0, tslope[trow, tpre], tslope0[:, None])[:, 0]
+        trate_pre = np.where(tind > 0, trate[trow, tpre], trate0[:, None])[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tstep = np.where(trate_pre < 0.0, tt_pre - tslope_pre / trate_pre, np.inf)
+        tstep = np.where(tslope0 <= 0.0, 0.0, np.minimum(tstep, tmax))
+        return np.maximum(tlam + tstep[:, None] * tdir, 0.0)
+
+    # Function to solve the Newton systems of the regularized Hessians thess (n, k, k) restricted to the active
+    # multipliers, the inactive ones getting no step
+    def solve(self, thess, tg, tactive):
+        tmask = tactive[:, :, None] & tactive[:, None, :]
+        thess = thess * tmask + np.eye(tg.shape[1]) * ~tactive[:, :, None]
+        return np.linalg.solve(thess, (tg * tactive)[:, :, None])[:, :, 0]
+
+    # Function to solve the dual of the projection of the rows of tz by the projected Newton method with exact line
+    # searches, over the multipliers of the sums, returns the projected rows and the rows converged
+    def newton(self, tz, max_it=50):
+        tnum = self.a.shape[0]
+        # Tolerance of the sums, not below the rounding errors of the rows far outside the box
+        ttol = self.tol * self.c + 8.0 * np.finfo(float).eps * np.max(np.abs(tz), axis=1, keepdims=True) \
+            * np.sum(np.abs(self.a), axis=1)
+        tx = np.minimum(np.maximum(tz, 0.0), self.upper)
+        tdone = np.zeros(tz.shape[0], dtype=bool)
+
+        # Iterating only the rows neither converged nor stalled
+        trow = np.arange(tz.shape[0])
+        tlam = np.zeros((tz.shape[0], tnum))
+        for iit in range(max_it):
+            ty, txr, tg = self.dual(tz, tlam)
+
+            # Optimality: multipliers >= 0, sums satisfied, and complementary slackness
+            tconv = np.all((tg <= ttol) & ((tlam == 0.0) | (np.abs(tg) <= ttol)), axis=1)
+            tx[trow[tconv]] = txr[tconv]
+            tdone[trow[tconv]] = True
+            if np.all(tconv):
+                break
+            trow, tz, tlam, ty, tg = trow[~tconv], tz[~tconv], tlam[~tconv], ty[~tconv], tg[~tconv]
+            ttol = ttol[~tconv]
+
+            # Newton direction on the active multipliers, with the generalized Hessian over the free sub-systems,
+            # dropping the multipliers at zero that it would make negative, only the rows with such multipliers
+            # being solved again
+            tactive = (tlam > 0.0) | (tg > 0.0)
+            tfree = ((ty > 0.0) & (ty < self.upper)).astype(float)
+            thess_full = (tfree[:, None, :] * self.a) @ self.a.T + np.diag(1.0e-10 * self.a_norm_sq)
+            tdir = self.solve(thess_full, tg, tactive)
+            for k in range(tnum):
+                tblock = (tlam == 0.0) & (tdir < 0.0)
+                tind = np.nonzero(np.any(tblock, axis=1))[0]
+                if len(tind) == 0:
+                    break
+                tactive[tind] = tactive[tind] & ~tblock[tind]
+                tdir[tind] = self.solve(thess_full[tind], tg[tind], tactive[tind])
+
+            # Projected gradient if the Newton direction is still blocked or not ascending
+            tgrad = np.any((tlam == 0.0) & (tdir < 0.0), axis=1) | (np.sum(tdir * tg, axis=1) <= 0.0)
+            tdir = np.where(tgrad[:, None], tg * ((tlam > 0.0) | (tg > 0.0)), tdir)
+
+            # Stalled rows are left to Dykstra's projections
+            tlam_new = self.line(tz, tlam, tdir)
+            tmove = np.any(tlam_new != tlam, axis=1)
+            trow, tz, tlam, ttol = trow[tmove], tz[tmove], tlam_new[tmove], ttol[tmove]
+            if len(trow) == 0:
+                break
+        return tx, tdone
+
+    # Function to project the rows of tz by Dykstra's alternating projections onto the sums and the box
+    def dykstra(self, tz):
+        tx = tz.copy()
+        tp = np.zeros((self.a.shape[0] + 1,) + tx.shape)
+        for iit in range(self.max_it):
+            tx_pre = tx
+            for k in range(self.a.shape[0]):
+                ty = tx + tp[k]
+                tx = ty - np.maximum(0.0, ty @ self.a[k] - self.c[k])[:, None] / self.a_norm_sq[k] * self.a[k]
+                tp[k] = ty - tx
+            ty = tx + tp[-1]
+            tx = np.minimum(np.maximum(ty, 0.0), self.upper)
+            tp[-1] = ty - tx
+            if np.max(np.abs(tx - tx_pre)) <= self.tol and not np.any(self.infeasible(tx)):
+                break
+        return tx
+
+    # Function to project a matrix (n, num_sub_sys) of beta_jm onto the feasible set
+    def project(self, beta_matrix):
+        beta_matrix = np.atleast_2d(beta_matrix)
+        tbox = np.minimum(np.maximum(beta_matrix, 0.0), self.upper)
+        if self.a.shape[0] == 0:
+            return tbox
+        tind = np.nonzero(self.infeasible(tbox))[0]
+        if len(tind) == 0:
+            return tbox
+
+        # Projecting only the infeasible rows, by the Newton method or Dykstra's projections if it fails
+        tz = beta_matrix[tind]
+        tx, tdone = self.newton(tz)
+        if not np.all(tdone):
+            tx[~tdone] = self.dykstra(tz[~tdone])
+
+        # Radial scaling towards beta = 0, which is feasible, removing the remaining violations of the sums
+        tscale = np.min(self.c / np.maximum(tx @ self.a.T, self.c), axis=1)
+        tbox[tind] = tx * tscale[:, None]
+        return tbox
@@ -0,0 +1,104 @@
+# =============================================================================#
+#                                                                              #
+#           The exact solver module for the short-ranged ordering              #
+#           correction                                                         #
+#                                                                              #
+# -----------------------------------------------------------------------------#
+# This module solves the objectives with a known structure over the box of     #
+# beta limits deterministically, instead of UAPSO.                             #
+# -----------------------------------------------------------------------------#
+# Original version: March 2022 by Okan K. Orhan                                #
+# =============================================================================#
+
+
+# !/bin/python3
+
+# Importing the libraries
+import numpy as np
+
+from Modulus.output_info import out_write
+
+
+# Function to determine the case of the exact solver from the objectives with non-zero weights
+#   'Mismatch'   : only O2 - O4, sqrt(beta * t^2) with non-negative weights, minimized at beta = 0
+#   'Fractional' : only O1, a ratio of affine functions of beta, minimized by the Dinkelbach method
+#   None         : mixed objectives or negative weights, left to UAPSO
+# The weights are paired with the objectives in increasing order, as in the cost of the kernel
+def exact_case(kernel):
+    tobj_list = sorted(kernel.obj_list)
+    if np.any(np.array(kernel.obj_weight) < 0):
+        return None
+    tactive = [tobj_list[i] for i in range(len(tobj_list)) if kernel.obj_weight[i] != 0]
+    if 1 not in tactive:
+        return 'Mismatch'
+    if tactive == [1]:
+        return 'Fractional'
+    return None
+
+
+# Function to minimize (g + u * beta) / (d * beta + eps) > 0 over the box 0 <= beta <= beta_limits,
+# if g + u * beta > 0 in the box. Returns the iterates, or None if the ratio is not positive anywhere.
+def dinkelbach(g, u, d, eps, beta_limits, max_it=100):
+    # Starting from the largest denominator
+    tbeta = np.where(d > 0, beta_limits, 0.0)
+    if d @ tbeta + eps <= 0:
+        return None
+    iterates = [tbeta]
+    tlambda = (g + u @ tbeta) / (d @ tbeta + eps)
+    for iit in range(max_it):
+        # The parametric problem is linear and separable in beta, solved at a vertex of the box
+        tbeta = np.where(u - tlambda * d < 0, beta_limits, 0.0)
+        tnum = g + u @ tbeta
+        tden = d @ tbeta + eps
+        if tnum - tlambda * tden >= -1.0e-12 * max(abs(tnum), 1.0):
+            break
+        iterates.append(tbeta)
+        tlambda = tnum / tden
+    return iterates
+
+
+# Function to find beta with g + u * beta equal to a small positive target and the largest denominator,
+# if g <= 0 <= g + u * beta_limits (u >= 0 for the elastic energy terms)
+def zero_ratio(g, u, d, beta_limits):
+    ttarget = -g + 1.0e-9 * max(abs(g), 1.0)
+    tbeta = np.where((u == 0) & (d > 0), beta_limits, 0.0)
+    # Filling the sub-systems in decreasing order of denominator gain per numerator cost
+    tind = np.nonzero(u > 0)[0]
+    for j in tind[np.argsort(-d[tind] / u[tind], kind='stable')]:
+        if ttarget <= 0:
+            break
+        tbeta[j] = min(beta_limits[j], ttarget / u[j])
+        ttarget -= u[j] * tbeta[j]
+    return tbeta
+
+
+# Function to solve the objectives exactly, returns the minimizers in the order they were found, or None
+def exact_solve(fileout, kernel, case):
+    if case == 'Mismatch':
+        out_write.misc(fileout, 8, 'O2 - O4 are non-negative and vanish at beta = 0')
+        return [np.zeros(kernel.num_sub_sys)]
+
+    g = kernel.g_norm_factor
+    u = kernel.delta_u
+    d = kernel.delta_gu
+    eps = kernel.g_offset
+    beta_limits = kernel.beta_limits
+    if g <= 0 <= g + u @ beta_limits:
+        # O1 vanishes on the hyperplane g + u * beta = 0, if its denominator does not
+        out_write.misc(fileout, 8, 'O1 vanishes on the hyperplane g + u * beta = 0 in the box of beta limits')
+        tbeta = zero_ratio(g, u, d, beta_limits)
+        if d @ tbeta + eps > 0:
+            return [tbeta]
+        out_write.misc(fileout, 8, 'The denominator of O1 is not positive on the hyperplane')
+        return None
+
+    if g > 0:
+        iterates = dinkelbach(g, u, d, eps, beta_limits)
+    else:
+        # Both numerator and denominator are negative for a non-negative O1
+        iterates = dinkelbach(-g, -u, -d, -eps, beta_limits)
+    if iterates is None:
+        out_write.warning(fileout, 'O1 is negative (1.0e5) in the whole box of beta limits!')
+        return [np.zeros(kernel.num_sub_sys)]
+    out_write.misc(fileout, 8, 'Dinkelbach method converged in ', str(len(iterates)) + ' iterations')
+    return iterates
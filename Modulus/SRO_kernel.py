@@ -0,0 +1,194 @@
+# =============================================================================#
+#                                                                              #
+#           The objective kernel module for the short-ranged ordering          #
+#           correction                                                         #
+#                                                                              #
+# -----------------------------------------------------------------------------#
+# This module precomputes the run-invariant terms of the objectives, so that   #
+# evaluating a set of beta_jm costs a few dot products.                        #
+# -----------------------------------------------------------------------------#
+# Original version: March 2022 by Okan K. Orhan                                #
+# =============================================================================#
+
+
+# !/bin/python3
+
+# Importing the libraries
+import numpy as np
+
+from Modulus.bravais_lattice_info import bravais_volume, cubic_ibrav
+from Modulus.SRO_constraints import feasible_set
+from Modulus.units_info import convert
+
+
+# Function to determine the unit conversion factor of the elastic energy terms
+def unit_factor(inp_par):
+    tconv = 1.0
+    if 'Bohr' in inp_par[5]:
+        tconv *= convert().a02m_3
+    elif 'Angstrom' in inp_par[5]:
+        tconv *= convert().A2m
+
+    if 'GPa' in inp_par[5]:
+        tconv *= 1.0e9
+    elif 'bar' in inp_par[5]:
+        tconv *= convert().bar2Pa
+
+    if 'eV' in inp_par[5]:
+        tconv *= convert().J2eV
+    elif 'Ha' in inp_par[5]:
+        tconv *= convert().Ha2J
+    elif 'Ry' in inp_par[5]:
+        tconv *= convert().Ry2J
+    return tconv
+
+
+# Objective kernel object, built once per job from the external data and the input parameters
+class obj_kernel:
+
+    def __init__(self, fileout, inp_par, ext_data, beta_limits):
+        self.obj_list = inp_par[10]
+        # Weight vectors of the objectives, more than one for a weight sweep (FixedObjWeight = F)
+        self.obj_weights = np.atleast_2d(np.array(inp_par[12], dtype=float))
+        self.obj_weight = self.obj_weights[0]
+        self.num_sub_sys = ext_data.shape[0] - 1
+        self.beta_limits = np.array(beta_limits, dtype=float)
+        self.sub_names = list(ext_data['Name'].iloc[1:])
+
+        # Feasible set of the constraints, projected onto instead of clipping to the beta limits (ConsProjection = T)
+        self.feasible = None
+        self.search_limits = self.beta_limits
+        if inp_par[31]:
+            self.feasible = feasible_set(inp_par, ext_data)
+            self.search_limits = self.feasible.upper
+
+        # Volumes of the main system and sub-systems, only if required by the objectives
+        tibrav = np.array(ext_data['Bravais'], dtype=float)
+        tcubic = np.all(np.isin(tibrav, cubic_ibrav))
+        self.volume = None
+        if (1 in self.obj_list and "Bulk modulus" in ext_data.columns) or (2 in self.obj_list and not tcubic):
+            self.volume = bravais_volume(fileout, tibrav, ext_data.filter(regex=r'^Celldm', axis=1))
+
+        if 1 in self.obj_list:
+            # Gibbs free energy terms
+            tenergy = np.array(ext_data['Energy'], dtype=float)
+            self.delta_g = tenergy[1:] - tenergy[0]
+            self.g_norm_factor = np.sum(self.beta_limits * self.delta_g)
+
+            # Elastic energy terms, volume mismatches times bulk modulus
+            self.delta_u = np.zeros(self.num_sub_sys)
+            if "Bulk modulus" in ext_data.columns:
+                tB = np.array(ext_data['Bulk modulus'], dtype=float)
+                self.delta_u = unit_factor(inp_par) * np.abs(self.volume[1:] - self.volume[0]) * tB[1:]
+            self.delta_gu = self.delta_g + self.delta_u
+            self.g_offset = self.num_sub_sys * 1.0e-6
+
+        if 2 in self.obj_list:
+            # Lattice parameter mismatches, or volume mismatches for non-cubic sub-systems
+            if tcubic:
+                tlat = np.array(ext_data['Celldm 1'], dtype=float)
+                self.size_label = 'Delta a'
+                self.size_sq = (1.0 - tlat[1:] / tlat[0]) ** 2
+            else:
+                self.size_label = 'Delta V'
+                self.size_sq = (1.0 - self.volume[1:] / self.volume[0]) ** 2
+
+        if 3 in self.obj_list:
+            tvec = np.array(ext_data['VEC'], dtype=float)
+            self.vec_sq = (1.0 - tvec[1:] / tvec[0]) ** 2
+
+        if 4 in self.obj_list:
+            tchi = np.array(ext_data['Electronegativity'], dtype=float)
+            self.chi_sq = (1.0 - tchi[1:] / tchi[0]) ** 2
+
+    # Function to calculate the objective matrix (n, n_objectives) for a matrix (n, num_sub_sys) of beta_jm
+    def objectives_batch(self, beta_matrix):
+        beta_matrix = np.atleast_2d(beta_matrix)
+        obj = []
+        if 1 in self.obj_list:
+            tnum = self.g_norm_factor + beta_matrix @ self.delta_u
+            DeltaG = tnum / (beta_matrix @ self.delta_gu + self.g_offset)
+            obj.append(np.where(DeltaG < 0, 1.0e5, DeltaG))
+
+        if 2 in self.obj_list:
+            obj.append(np.sqrt(beta_matrix @ self.size_sq))
+
+        if 3 in self.obj_list:
+            obj.append(np.sqrt(beta_matrix @ self.vec_sq))
+
+        if 4 in self.obj_list:
+            obj.append(np.sqrt(beta_matrix @ self.chi_sq))
+
+        return np.stack(obj, axis=1)
+
+    # Function to calculate the objective matrix and the cost vector for a matrix of beta_jm
+    def cost_batch(self, beta_matrix):
+        obj = self.objectives_batch(beta_matrix)
+        return obj, obj @ self.obj_weight
+
+    # Function to calculate the figure of merits (n, n_fom) for a matrix of beta_jm
+    def fig_of_merit_batch(self, beta_matrix):
+        beta_matrix = np.atleast_2d(beta_matrix)
+        fom = []
+        index = []
+        if 1 in self.obj_list:
+            fom.append(beta_matrix @ self.delta_gu)
+            index.append('G_SRO')
+
+        if 2 in self.obj_list:
+            fom.append(np.sqrt(beta_matrix @ self.size_sq))
+            index.append(self.size_label)
+
+        if 3 in self.obj_list:
+            fom.append(np.sqrt(beta_matrix @ self.vec_sq))
+            index.append('Delta VEC')
+
+        if 4 in self.obj_list:
+            fom.append(np.sqrt(beta_matrix @ self.chi_sq))
+            index.append('Delta Chi')
+
+        return np.stack(fom, axis=1), index
+
+    # Function to calculate the cost and its analytic gradient for a given beta_jm
+    def cost_gradient(self, beta_list):
+        beta_list = np.asarray(beta_list, dtype=float)
+        obj = []
+        grad = []
+        if 1 in self.obj_list:
+            tnum = self.g_norm_factor + beta_list @ self.delta_u
+            tden = beta_list @ self.delta_gu + self.g_offset
+            if tnum / tden < 0:
+                obj.append(1.0e5)
+                grad.append(np.zeros(self.num_sub_sys))
+            else:
+                obj.append(tnum / tden)
+                grad.append((self.delta_u * tden - tnum * self.delta_gu) / tden ** 2)
+
+        # d sqrt(beta * t^2) / d beta = t^2 / (2 sqrt(beta * t^2)), regularized at zero
+        for tsq, tind in [('size_sq', 2), ('vec_sq', 3), ('chi_sq', 4)]:
+            if tind in self.obj_list:
+                tval = np.sqrt(beta_list @ getattr(self, tsq))
+                obj.append(tval)
+                grad.append(getattr(self, tsq) / (2.0 * max(tval, 1.0e-150)))
+
+        return np.array(obj) @ self.obj_weight, np.array(grad).T @ self.obj_weight
+
+    # Function to bring a matrix (n, num_sub_sys) of beta_jm into the search space, by clipping to the beta limits
+    # or by projecting onto the feasible set
+    def project(self, beta_matrix):
+        if self.feasible is None:
+            return np.minimum(np.maximum(np.atleast_2d(beta_matrix), 0.0), self.beta_limits)
+        return self.feasible.project(beta_matrix)
+
+    # Function to calculate the objectives for a given beta_jm
+    def objectives(self, beta_list):
+        return self.objectives_batch(beta_list)[0]
+
+    # Function to calculate the cost for a given beta_jm
+    def cost(self, beta_list):
+        return self.cost_batch(beta_list)[1][0]
+
+    # Function to calculate the figure of merits for a given beta_jm
+    def fig_of_merit(self, beta_list):
+        fom, index = self.fig_of_merit_batch(beta_list)
+        return list(fom[0]), index
@@ -0,0 +1,36 @@
+#=============================================================================#
+#                                                                             #
+#                     The short-ranged order correction task.                 #
+#                                                                             #
+#-----------------------------------------------------------------------------#
+# This module runs the phases of the SRO_Cor task after the input check, and  #
+# is imported only if the task is selected.                                   #
+#-----------------------------------------------------------------------------#
+# Original version: March 2022 by Okan K. Orhan                               #
+#=============================================================================#
+
+#!/bin/python3
+
+import time
+from Modulus.external_database import cached_raw_data
+from Modulus.SRO_UAPSO import UAPSO
+from Modulus.output_info import out_write
+from Modulus.telemetry_info import telemetry
+
+
+# Function to run the SRO_Cor task, xlsxfile is an already parsed database (if given)
+def SRO_Cor(fileout, inp_par, resume=False, xlsxfile=None):
+
+    # Reading the XLSX file
+    out_write.process_init(fileout, 'Checking the XLSX file for short-ranged order correction')
+    tstart = time.perf_counter()
+    ext_data = cached_raw_data(inp_par, fileout, xlsxfile)
+    telemetry.add('XLSX database', time.perf_counter() - tstart)
+    out_write.process_end(fileout)
+
+    # Performing UAPSO
+    out_write.process_init(fileout, 'Running the unique adaptive particle-swarm optimization (UAPSO)')
+    tstart = time.perf_counter()
+    UAPSO(fileout, inp_par, ext_data, resume)
+    telemetry.add('UAPSO', time.perf_counter() - tstart)
+    out_write.process_end(fileout)
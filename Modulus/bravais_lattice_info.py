@@ -15,45 +15,134 @@ import numpy as np
 from Modulus.output_info import out_write
 
 
+# Lattice parameters required by each Bravais index, in the Quantum ESPRESSO convention: celldm(1) = a,
+# celldm(2) = b/a, celldm(3) = c/a, celldm(4), celldm(5), celldm(6) = cosines of the angles
+celldm_required = {1: [0], 2: [0], 3: [0], -3: [0], 4: [0, 2], 5: [0, 3], -5: [0, 3], 6: [0, 2], 7: [0, 2],
+                   8: [0, 1, 2], 9: [0, 1, 2], -9: [0, 1, 2], 91: [0, 1, 2], 10: [0, 1, 2], 11: [0, 1, 2],
+                   12: [0, 1, 2, 3], -12: [0, 1, 2, 4], 13: [0, 1, 2, 3], -13: [0, 1, 2, 4],
+                   14: [0, 1, 2, 3, 4, 5]}
+
+# Cubic Bravais indices, whose lattice parameters alone compare the sizes of the systems
+cubic_ibrav = (1, 2, 3, -3)
+
+
+# Function to stack the rows (x, y, z) of the lattice vectors into (n, 3, 3) arrays
+def stack_vectors(v1, v2, v3):
+    return np.stack([np.stack(tv, axis=-1) for tv in [v1, v2, v3]], axis=1)
+
+
+# Function to calculate the lattice vectors for an array of lattice parameters (n, 6) of a Bravais index
+def lattice_vectors(ibrav, celldm):
+    a = celldm[:, 0]
+    b = a * celldm[:, 1]
+    c = a * celldm[:, 2]
+    tzero = np.zeros_like(a)
+
+    if ibrav == 1:
+        # Simple cubic
+        return stack_vectors([a, tzero, tzero], [tzero, a, tzero], [tzero, tzero, a])
+    elif ibrav == 2:
+        # Face-centred cubic
+        return 0.5 * stack_vectors([-a, tzero, a], [tzero, a, a], [-a, a, tzero])
+    elif ibrav == 3:
+        # Body-centred cubic
+        return 0.5 * stack_vectors([a, a, a], [-a, a, a], [-a, -a, a])
+    elif ibrav == -3:
+        # Body-centred cubic, more symmetric axes
+        return 0.5 * stack_vectors([-a, a, a], [a, -a, a], [a, a, -a])
+    elif ibrav == 4:
+        # Hexagonal
+        return stack_vectors([a, tzero, tzero], [-0.5 * a, 0.5 * np.sqrt(3.0) * a, tzero], [tzero, tzero, c])
+    elif ibrav in [5, -5]:
+        # Trigonal R, 3-fold axis along z (5) or <111> (-5)
+        tcos = celldm[:, 3]
+        tx = np.sqrt((1.0 - tcos) / 2.0)
+        ty = np.sqrt((1.0 - tcos) / 6.0)
+        tz = np.sqrt((1.0 + 2.0 * tcos) / 3.0)
+        if ibrav == 5:
+            return stack_vectors([a * tx, -a * ty, a * tz], [tzero, 2.0 * a * ty, a * tz], [-a * tx, -a * ty, a * tz])
+        tu = a / np.sqrt(3.0) * (tz - 2.0 * np.sqrt(2.0) * ty)
+        tv = a / np.sqrt(3.0) * (tz + np.sqrt(2.0) * ty)
+        return stack_vectors([tu, tv, tv], [tv, tu, tv], [tv, tv, tu])
+    elif ibrav == 6:
+        # Simple tetragonal
+        return stack_vectors([a, tzero, tzero], [tzero, a, tzero], [tzero, tzero, c])
+    elif ibrav == 7:
+        # Body-centred tetragonal
+        return 0.5 * stack_vectors([a, -a, c], [a, a, c], [-a, -a, c])
+    elif ibrav == 8:
+        # Simple orthorhombic
+        return stack_vectors([a, tzero, tzero], [tzero, b, tzero], [tzero, tzero, c])
+    elif ibrav == 9:
+        # Base-centred orthorhombic, C-type
+        return stack_vectors([0.5 * a, 0.5 * b, tzero], [-0.5 * a, 0.5 * b, tzero], [tzero, tzero, c])
+    elif ibrav == -9:
+        # Base-centred orthorhombic, C-type, alternate axes
+        return stack_vectors([0.5 * a, -0.5 * b, tzero], [0.5 * a, 0.5 * b, tzero], [tzero, tzero, c])
+    elif ibrav == 91:
+        # Base-centred orthorhombic, A-type
+        return stack_vectors([a, tzero, tzero], [tzero, 0.5 * b, -0.5 * c], [tzero, 0.5 * b, 0.5 * c])
+    elif ibrav == 10:
+        # Face-centred orthorhombic
+        return 0.5 * stack_vectors([a, tzero, c], [a, b, tzero], [tzero, b, c])
+    elif ibrav == 11:
+        # Body-centred orthorhombic
+        return 0.5 * stack_vectors([a, b, c], [-a, b, c], [-a, -b, c])
+    elif ibrav in [12, 13]:
+        # Monoclinic, simple (12) or base-centred (13), unique axis c, celldm(4) = cos(ab)
+        tcos = celldm[:, 3]
+        tsin = np.sqrt(1.0 - tcos * tcos)
+        if ibrav == 12:
+            return stack_vectors([a, tzero, tzero], [b * tcos, b * tsin, tzero], [tzero, tzero, c])
+        return stack_vectors([0.5 * a, tzero, -0.5 * c], [b * tcos, b * tsin, tzero], [0.5 * a, tzero, 0.5 * c])
+    elif ibrav in [-12, -13]:
+        # Monoclinic, simple (-12) or base-centred (-13), unique axis b, celldm(5) = cos(ac)
+        tcos = celldm[:, 4]
+        tsin = np.sqrt(1.0 - tcos * tcos)
+        if ibrav == -12:
+            return stack_vectors([a, tzero, tzero], [tzero, b, tzero], [c * tcos, tzero, c * tsin])
+        return stack_vectors([0.5 * a, 0.5 * b, tzero], [-0.5 * a, 0.5 * b, tzero], [c * tcos, tzero, c * tsin])
+    else:
+        # Triclinic, celldm(4) = cos(bc), celldm(5) = cos(ac), celldm(6) = cos(ab)
+        tcos_bc = celldm[:, 3]
+        tcos_ac = celldm[:, 4]
+        tcos_ab = celldm[:, 5]
+        tsin_ab = np.sqrt(1.0 - tcos_ab * tcos_ab)
+        tz = np.sqrt(1.0 + 2.0 * tcos_bc * tcos_ac * tcos_ab - tcos_bc ** 2 - tcos_ac ** 2 - tcos_ab ** 2) / tsin_ab
+        return stack_vectors([a, tzero, tzero], [b * tcos_ab, b * tsin_ab, tzero],
+                             [c * tcos_ac, c * (tcos_bc - tcos_ac * tcos_ab) / tsin_ab, c * tz])
+
+
+# Function to calculate the volumes, and optionally the lattice vectors (n, 3, 3), of the Bravais indices (n,) and
+# lattice parameters (n, up to 6) of the systems in one call, missing lattice parameters being NaN
+def bravais_volume(fileout, ibrav, celldm, vectors=False):
+    tibrav = np.atleast_1d(np.array(ibrav, dtype=float))
+    tgiven = np.atleast_2d(np.array(celldm, dtype=float))[:, :6]
+    tcelldm = np.full((tibrav.shape[0], 6), np.nan)
+    tcelldm[:, :tgiven.shape[1]] = tgiven
+
+    lat_vec = np.zeros((tibrav.shape[0], 3, 3))
+    for tind in np.unique(tibrav):
+        if tind not in celldm_required:
+            out_write.error(fileout, 'Unknown Bravais index ' + '%g' % tind)
+        trows = tibrav == tind
+        tpar = tcelldm[trows]
+        if np.any(np.isnan(tpar[:, celldm_required[tind]])) or np.any(tpar[:, 0] <= 0.0):
+            out_write.error(fileout, 'Wrong lattice parameter (s) for Bravais index ' + str(int(tind)))
+        with np.errstate(invalid='ignore'):
+            lat_vec[trows] = lattice_vectors(int(tind), tpar)
+
+    volume = np.abs(np.linalg.det(lat_vec))
+    if not np.all(volume > 0.0):
+        tind = tibrav[~(volume > 0.0)][0]
+        out_write.error(fileout, 'Wrong lattice parameter (s) for Bravais index ' + str(int(tind)))
+    if vectors:
+        return volume, lat_vec
+    return volume
+
+
 class bravais:
     def __init__(self, fileout, ibrav, celldm):
-        if ibrav == 1:
-            if len(celldm) == 1:
-                a = celldm[0]
-                self.lat_vec = a * np.array([[1.0, 0.0, 0.0],
-                                             [0.0, 1.0, 0.0],
-                                             [0.0, 0.0, 1.0]])
-                self.volume = a * a * a
-            else:
-                out_write.error(fileout, 'Wrong lattice parameter (s) for Bravais index ' + str(ibrav))
-
-        elif ibrav == 2:
-            if len(celldm) == 1:
-                a = celldm[0]
-                self.lat_vec = 0.5 * a * np.array([[-1.0, 0.0, 1.0],
-                                                   [0.0, 1.0, 1.0],
-                                                   [-1.0, 1.0, 0.0]])
-                self.volume = 0.25 * (a * a * a)
-            else:
-                out_write.error(fileout, 'Wrong lattice parameter (s) for Bravais index ' + str(ibrav))
-
-        elif ibrav == 3:
-            if len(celldm) == 1:
-                a = celldm[0]
-                self.lat_vec = 0.5 * a * np.array([[1.0, 1.0, 1.0],
-                                                   [-1.0, 1.0, 1.0],
-                                                   [-1.0, -1.0, 1.0]])
-                self.volume = 0.25 * (a * a * a)
-            else:
-                out_write.error(fileout, 'Wrong lattice parameter (s) for Bravais index ' + str(ibrav))
-
-        elif ibrav == 4:
-            if len(celldm) == 2:
-                a = celldm[0]
-                c = celldm[1]
-                self.lat_vec = a * np.array([[1.0, 0.0, 0.0],
-                                             [-1.0 / 2.0, np.sqrt(3.0) / 2.0, 0.0],
-                                             [0.0, 0.0, c / a]])
-                self.volume = (0.5 * a * a * np.sin(np.pi * 120 / 180)) * c
-            else:
-                out_write.error(fileout, 'Wrong lattice parameter (s) for Bravais index ' + str(ibrav))
+        tvolume, tlat_vec = bravais_volume(fileout, [ibrav], [celldm], vectors=True)
+        self.lat_vec = tlat_vec[0]
+        self.volume = tvolume[0]
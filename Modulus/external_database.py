@@ -10,25 +10,110 @@
 
 #!/bin/python3
 
+import os
+import re
+import pickle
+import hashlib
+import weakref
+import itertools
 import numpy as np
 import pandas as pd
 from Modulus.output_info import out_write
+from Modulus.atomic_info import atom
 
-def raw_data(inp_par, fileout):
+# Version of the cached relevant systems, to be increased if raw_data changes its output
+cache_version = 2
 
-    fout = open(fileout, "a")
+# Content hashes of the databases, by their absolute path, size and modification time
+database_hashes = {}
+
+# Composition indices of the parsed databases, by the identity of the database and its element columns
+database_indices = {}
+
+
+# Composition index of a parsed database, hashing the quantized molar fractions and the element sets to rows
+class composition_index:
+
+    def __init__(self, xlsxfile, columns, decimals=3):
+        self.columns = list(columns)
+        self.position = {self.columns[j]: j for j in range(len(self.columns))}
+        self.scale = 10 ** decimals
+
+        # Molar fractions of all element columns, blank cells are zero
+        self.frac = np.nan_to_num(np.array(xlsxfile[self.columns], dtype=float))
+        tkeys = np.rint(self.frac * self.scale).astype(np.int64)
+        self.by_frac = {}
+        self.by_set = {}
+        for i in range(tkeys.shape[0]):
+            self.by_frac.setdefault(tkeys[i].tobytes(), []).append(i)
+            self.by_set.setdefault(frozenset(np.nonzero(tkeys[i])[0]), []).append(i)
+
+    # Function to find the rows of a system with the given molar fractions of the given columns, others being zero
+    def system(self, columns, molar_frac):
+        tkey = np.zeros(len(self.columns), dtype=np.int64)
+        for tcol, tfrac in zip(columns, molar_frac):
+            tkey[self.position[tcol]] = np.rint(float(tfrac) * self.scale)
+        return list(self.by_frac.get(tkey.tobytes(), []))
+
+    # Function to find the rows of the sub-systems of the given columns, without any other element
+    def sub_systems(self, columns):
+        tset = frozenset([self.position[tcol] for tcol in columns])
+        rows = []
+        if 2 ** len(tset) <= len(self.by_set):
+            # Looking up every non-empty subset of the elements
+            for torder in range(1, len(tset) + 1):
+                for tsub in itertools.combinations(sorted(tset), torder):
+                    rows.extend(self.by_set.get(frozenset(tsub), []))
+        else:
+            # Fewer element sets in the database than subsets of the elements
+            for tsub, trows in self.by_set.items():
+                if 0 < len(tsub) and tsub <= tset:
+                    rows.extend(trows)
+        rows = np.sort(np.array(rows, dtype=np.int64))
+        # Complete sub-systems, whose molar fractions sum up to 1
+        tsum = np.sum(self.frac[rows][:, [self.position[tcol] for tcol in columns]], axis=1)
+        return list(rows[np.round(tsum, 1) == 1.0])
+
+
+# Function to return the composition index of a parsed database, built once for all the queries on it
+def database_index(xlsxfile, columns):
+    tcols = [tcol for tcol in xlsxfile.columns if str(tcol).strip() in atom().symbol]
+    tcols += [tcol for tcol in columns if tcol not in tcols]
+    tkey = (id(xlsxfile), tuple(tcols))
+    if tkey in database_indices and database_indices[tkey][0]() is xlsxfile:
+        return database_indices[tkey][1]
+    # Forgetting the indices of the released databases
+    for tdead in [tdead for tdead in database_indices if database_indices[tdead][0]() is None]:
+        del database_indices[tdead]
+    tindex = composition_index(xlsxfile, tcols)
+    database_indices[tkey] = (weakref.ref(xlsxfile), tindex)
+    return tindex
+
+# Function to parse the first sheet of an XLSX database
+def read_database(filename, fileout):
+    while True:
+        try:
+            xlsxfile = pd.ExcelFile(filename).parse(0)
+            break
+        except FileNotFoundError:
+            out_write.error(fileout, 'XLSX file not found!')
+    return xlsxfile
+
+
+# Function to collect the data of the relevant systems, xlsxfile is an already parsed database (if given)
+def raw_data(inp_par, fileout, xlsxfile=None):
 
     # Reading XLSX file if task = SRO_Cor
     if inp_par[0] == 'SRO_Cor':
         tdata =[]
 
-        # Checking XLSX file existence
-        while True:
-            try:
-                xlsxfile = pd.ExcelFile(inp_par[4]).parse(0)
-                break
-            except FileNotFoundError:
-                out_write.error(fileout, 'XLSX file not found!')
+        # Checking XLSX file existence, or querying only the relevant rows and columns of an SQLite database
+        if xlsxfile is None:
+            from Modulus.sqlite_database import is_sqlite, query_database
+            if is_sqlite(inp_par[4]):
+                xlsxfile = query_database(inp_par, fileout)
+            else:
+                xlsxfile = read_database(inp_par[4], fileout)
 
         # Checking for molar fractions
 
@@ -42,28 +127,20 @@ def raw_data(inp_par, fileout):
             if xlsx_col_name.str.contains(ttag).any():
                 tind = np.where(xlsx_col_name.str.contains(ttag))[0]
                 if len(tind) == 1:
-                    tdata.append(xlsxfile[xlsxfile.columns[tind[0]]])
+                    tdata.append(xlsxfile.columns[tind[0]])
                 else:
                     out_write.error(fileout, 'Repeated columns in XLSX file!')
             else:
                 out_write.error(fileout, 'Missing molar fractions in XLSX file!')
 
-        tdata = pd.DataFrame(tdata).T
-
-        # Determining indices of main system and sub-systems
-        sys_ind = []
-        for i in range(len(tdata)):
-            a1 = np.around(np.array(inp_par[3]), decimals = 3)
-            a2 = np.around(tdata.iloc[i], decimals = 3)
-            if (np.array_equal(a1, a2)):
-                sys_ind.append(i)
+        # Determining indices of main system and its sub-systems through the composition index
+        tindex = database_index(xlsxfile, tdata)
+        sys_ind = tindex.system(tdata, inp_par[3])
 
         if len(sys_ind) == 0:
-            out_write.error(fileout, +inp_par[1]+' data is missing in XLSX data!')
-
+            out_write.error(fileout, inp_par[1] + ' data is missing in XLSX data!')
 
-        sub_sys_ind = tdata.sum(axis = 1)[round(tdata.sum(axis = 1),1) == 1.0].index
-        sub_sys_ind = sub_sys_ind.drop(sys_ind)
+        sub_sys_ind = [i for i in tindex.sub_systems(tdata) if i not in sys_ind]
         tdata = pd.concat([xlsxfile.iloc[sys_ind],xlsxfile.iloc[sub_sys_ind]])
         num_sys = len(sub_sys_ind) + 1
 
@@ -107,30 +184,24 @@ def raw_data(inp_par, fileout):
                 tlist.append(int(1))
             ext_data['Bravais'] = pd.Series(tlist, index=ext_data.index)
 
-            # Bravais index
-        if xlsx_col_name.str.contains('bravais').any():
-            if sum(xlsx_col_name.str.count('bravais')) == 1:
-                tind = np.where(xlsx_col_name.str.contains('bravais'))[0]
-                ext_data['Bravais'] = tdata[tdata.columns[tind[0]]]
-            else:
-                out_write.error(fileout, 'Repeated columns in XLSX file!')
-        else:
-            out_write.warning(fileout, 'Missing Bravais indices in XLSX file! '
-                           'Simple-cubic structure is assumed.')
-            tlist = []
-            for i in range(num_sys):
-                tlist.append(int(1))
-            ext_data['Bravais'] = pd.Series(tlist, index=ext_data.index)
-
             # Objectives 1 or 2 --> Lattice parameters
         if 1 in inp_par[10] or 2 in inp_par[10]:
             if xlsx_col_name.str.contains('celldm').any():
-                if sum(xlsx_col_name.str.count('celldm')) <= 6:
-                    tind = np.where(xlsx_col_name.str.contains('celldm'))
-                    for i in range(len(tind[0])):
-                        ext_data['Celldm ' + str(i+1)] = tdata[tdata.columns[tind[0][i]]]
-                else:
-                    out_write.error(fileout, 'Repeated lattice parameters in XLSX file!')
+                # Index of each lattice parameter from the suffix of its column, e.g. Celldm 3 --> celldm(3)
+                tcelldm = {}
+                for i in np.where(xlsx_col_name.str.contains('celldm'))[0]:
+                    tsuffix = re.findall(r'celldm\D*(\d+)', xlsx_col_name[i])
+                    if len(tsuffix) != 1 or int(tsuffix[0]) not in range(1, 7):
+                        out_write.error(fileout, 'Wrong lattice parameter column ' + str(tdata.columns[i])
+                                        + ' in XLSX file!')
+                    if int(tsuffix[0]) in tcelldm:
+                        out_write.error(fileout, 'Repeated lattice parameters in XLSX file!')
+                    tcelldm[int(tsuffix[0])] = tdata.columns[i]
+                if 1 not in tcelldm:
+                    out_write.error(fileout, 'Missing lattice parameters in XLSX file!')
+                # Lattice parameters in the order of their indices, those not given being NaN
+                for i in range(1, max(tcelldm) + 1):
+                    ext_data['Celldm ' + str(i)] = tdata[tcelldm[i]] if i in tcelldm else np.nan
             else:
                 out_write.error(fileout, 'Missing lattice parameters in XLSX file!')
 
@@ -182,3 +253,62 @@ def raw_data(inp_par, fileout):
     return ext_data.reset_index(drop=True)
 
 
+# Function to calculate the SHA-256 hash of the content of a database
+def database_hash(filename, fileout):
+    try:
+        tstat = os.stat(filename)
+    except FileNotFoundError:
+        out_write.error(fileout, 'XLSX file not found!')
+    tkey = (os.path.abspath(filename), tstat.st_size, tstat.st_mtime_ns)
+    if tkey not in database_hashes:
+        thash = hashlib.sha256()
+        with open(filename, 'rb') as fp:
+            for tblock in iter(lambda: fp.read(1 << 20), b''):
+                thash.update(tblock)
+        database_hashes[tkey] = thash.hexdigest()
+    return database_hashes[tkey]
+
+
+# Function to determine the cache file of the relevant systems, keyed by the content of the database and the
+# input parameters used by raw_data
+def cache_file(inp_par, fileout):
+    tkey = repr((cache_version, database_hash(inp_par[4], fileout), inp_par[0], list(inp_par[2]),
+                 [round(float(tval), 3) for tval in inp_par[3]], sorted(inp_par[10])))
+    return os.path.join(inp_par[30], hashlib.sha256(tkey.encode()).hexdigest() + '.pkl')
+
+
+# Function to collect the data of the relevant systems through the on-disk cache (DataCache), replaying the
+# warnings of the cached database on a hit
+def cached_raw_data(inp_par, fileout, xlsxfile=None):
+    if inp_par[30] is None:
+        return raw_data(inp_par, fileout, xlsxfile)
+
+    tfile = cache_file(inp_par, fileout)
+    if os.path.isfile(tfile):
+        try:
+            with open(tfile, 'rb') as fp:
+                ext_data, twarnings = pickle.load(fp)
+            out_write.misc(fileout, 1, 'Relevant systems read from the cache ', tfile)
+            for tline in twarnings:
+                out_write.warning(fileout, tline)
+            return ext_data
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            out_write.warning(fileout, 'Unreadable cache file ' + tfile + '! The database is parsed again.')
+
+    out_write.recorded = []
+    try:
+        ext_data = raw_data(inp_par, fileout, xlsxfile)
+        twarnings = out_write.recorded
+    finally:
+        out_write.recorded = None
+
+    # Writing through a temporary file, so that concurrent jobs never read a partial cache file
+    os.makedirs(inp_par[30], exist_ok=True)
+    ttmp = tfile + '.' + str(os.getpid()) + '.tmp'
+    with open(ttmp, 'wb') as fp:
+        pickle.dump((ext_data, twarnings), fp, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(ttmp, tfile)
+    out_write.misc(fileout, 1, 'Relevant systems written into the cache ', tfile)
+    return ext_data
+
+
@@ -11,13 +11,42 @@
 #!/bin/python3
 
 
-import numpy as np
+import os
 from Modulus.input_info import keywords
 from Modulus.output_info import out_write
 from Modulus.atomic_info import atom
 from Modulus.units_info import units
 
 
+# Function to check a vector of objective weights
+def weight_check(fileout, tval, num_obj):
+    tval = tval.split(",")
+    if len(tval) != num_obj:
+        out_write.error(fileout, 'Mismatched number of ObjIndex and ObjWeight!')
+    for j in range(len(tval)):
+        tval[j] = float(tval[j])
+        if tval[j] < 0 or tval[j] > 1:
+            out_write.error(fileout, 'Bad ObjWeight!')
+    if abs(sum(tval) - 1.0) > 1.0e-6:
+        out_write.error(fileout, 'Bad ObjWeight!')
+    return tval
+
+
+# Function to generate the weight vectors on the simplex with a step of 1/num_div, neighbours following each other
+def weight_grid(num_obj, num_div):
+    if num_obj == 1:
+        return [[1.0]]
+    grid = []
+    for i in range(num_div + 1):
+        tsub = weight_grid(num_obj - 1, num_div - i) if i < num_div else [[0.0] * (num_obj - 1)]
+        # Reversing every other sub-grid to keep the consecutive weight vectors close
+        if i % 2 == 1:
+            tsub = tsub[::-1]
+        for tweight in tsub:
+            grid.append([i / num_div] + [tw * (num_div - i) / num_div for tw in tweight])
+    return grid
+
+
 def input_check(fileinp, fileout):
 
     # Reading the input file
@@ -26,7 +55,6 @@ def input_check(fileinp, fileout):
         for line in fp.readlines():
             if line.strip():
                 inp_lines.append(line.strip())
-    inp_lines = np.array(inp_lines)
 
     # Checking the task type
     while True:
@@ -44,14 +72,26 @@ def input_check(fileinp, fileout):
 
     # Checking the task-specific blocks
     for i in range(3):
-        if not np.any(inp_lines == keywords(task).inp_blocks[i]):
+        if keywords(task).inp_blocks[i] not in inp_lines:
             out_write.error(fileout,'Missing input block!')
 
     tind = []
     for i in range(len(inp_lines)):
         if '&' in inp_lines[i]:
             tind.append(i)
-    inp_lines = np.delete(inp_lines, tind, None)
+    inp_lines = [inp_lines[i] for i in range(len(inp_lines)) if i not in tind]
+
+    # Separating the optional task-specific input keywords
+    inp_opt = {}
+    tind = []
+    for i in range(len(inp_lines)):
+        tkey = inp_lines[i].split("=")[0].rstrip()
+        if tkey in keywords(task).inp_opt_keys:
+            if tkey in inp_opt:
+                out_write.error(fileout, 'Repeated input keyword ' + tkey + '!')
+            inp_opt[tkey] = inp_lines[i].partition("=")[2].lstrip()
+            tind.append(i)
+    inp_lines = [inp_lines[i] for i in range(len(inp_lines)) if i not in tind]
 
     # Checking the task-specific input keywords
     if not len(inp_lines) == keywords(task).inp_keys_num:
@@ -107,7 +147,7 @@ def input_check(fileinp, fileout):
 
                     if i == 4:
                         tval = tval.strip()
-                        if len(tval) < 5 or not tval.endswith(".xlsx"):
+                        if len(tval) < 5 or not tval.lower().endswith((".xlsx", ".db", ".sqlite", ".sqlite3")):
                             out_write.error(fileout, 'Bad XLSX file name!')
                         else:inp_par.append(tval)
 
@@ -176,16 +216,22 @@ def input_check(fileinp, fileout):
                         inp_par.append(tval)
 
                     if i == 12:
-                        tval = tval.split(",")
-                        if len(tval) != len(inp_par[i-2]):
-                            out_write.error(fileout, 'Mismatched number of ObjIndex and ObjWeight!')
-                        for j in range(len(tval)):
-                            tval[j] = float(tval[j])
-                            if tval[j] < 0 or tval[j] > 1:
-                                out_write.error(fileout, 'Bad ObjWeight!')
-                        if sum(tval) != 1.0:
-                            out_write.error(fileout, 'Bad ObjWeight!')
+                        if not tval.strip():
+                            out_write.error(fileout, 'Missing ObjWeight!')
+                        if inp_par[11]:
+                            inp_par.append(weight_check(fileout, tval, len(inp_par[i-2])))
+                        elif tval.split()[0] == 'Grid':
+                            # Weight sweep over a grid on the simplex of weights with a step of 1/N
+                            if len(tval.split()) != 2 or int(tval.split()[1]) <= 0:
+                                out_write.error(fileout, 'Bad ObjWeight grid!')
+                            inp_par.append(weight_grid(len(inp_par[i-2]), int(tval.split()[1])))
                         else:
+                            # Weight sweep over a list of weight vectors separated by ;, none of them empty
+                            tval = tval.split(";")
+                            for j in range(len(tval)):
+                                if not tval[j].strip():
+                                    out_write.error(fileout, 'Bad ObjWeight list!')
+                                tval[j] = weight_check(fileout, tval[j], len(inp_par[i-2]))
                             inp_par.append(tval)
 
                     if i == 13:
@@ -205,6 +251,68 @@ def input_check(fileinp, fileout):
                 except ValueError:
                     out_write.error(fileout, 'Input value error!')
 
+        # Optional input keywords, set to their default values if missing
+        for i in range(len(keywords(task).inp_opt_keys)):
+            tkey = keywords(task).inp_opt_keys[i]
+            if tkey not in inp_opt:
+                inp_par.append(keywords(task).inp_opt_default[i])
+                continue
+            tval = inp_opt[tkey]
+            try:
+                if tkey == 'Jobs':
+                    tval = int(tval)
+                    if tval <= 0:
+                        out_write.error(fileout, 'Bad Jobs number!')
+
+                if tkey == 'Verbosity':
+                    tval = int(tval)
+                    if tval not in [0, 1, 2]:
+                        out_write.error(fileout, 'Bad Verbosity level!')
+
+                if tkey == 'OutputFormat':
+                    if tval not in ['XLSX', 'NPZ', 'Both']:
+                        out_write.error(fileout, 'Bad OutputFormat!')
+
+                if tkey == 'Solver':
+                    if tval not in ['UAPSO', 'Exact', 'Auto']:
+                        out_write.error(fileout, 'Bad Solver!')
+
+                if tkey == 'WarmStart':
+                    tval = [tfile.strip() for tfile in tval.split(",")]
+                    for tfile in tval:
+                        if not tfile.endswith(('.xlsx', '.npz')) or not os.path.isfile(tfile):
+                            out_write.error(fileout, 'Bad WarmStart file ' + tfile + '!')
+
+                if tkey == 'DataCache':
+                    if len(tval) == 0 or (os.path.exists(tval) and not os.path.isdir(tval)):
+                        out_write.error(fileout, 'Bad DataCache directory!')
+
+                if tkey == 'WarmFrac':
+                    tval = float(tval)
+                    if not 0 < tval <= 1:
+                        out_write.error(fileout, 'Bad WarmFrac value!')
+
+                if tkey in ['StagnationIt', 'MaxEval', 'LogEvery', 'Checkpoint', 'Seed']:
+                    tval = int(tval)
+                    if tval < 0:
+                        out_write.error(fileout, 'Bad ' + tkey + ' number!')
+
+                if tkey in ['Telemetry', 'Polish', 'ConsProjection', 'IndependentBest']:
+                    if tval == 'T':
+                        tval = True
+                    elif tval == 'F':
+                        tval = False
+                    else:
+                        out_write.error(fileout, 'Bad logical condition in the input file!')
+
+                if tkey in ['CostTol', 'DiameterTol', 'MaxTime']:
+                    tval = float(tval)
+                    if tval < 0:
+                        out_write.error(fileout, 'Bad ' + tkey + ' value!')
+                inp_par.append(tval)
+            except ValueError:
+                out_write.error(fileout, 'Input value error!')
+
     return (inp_par)
 
 
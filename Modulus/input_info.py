@@ -10,9 +10,21 @@
 
 #!/bin/python3
 
+import importlib
+
+# Registry of the tasks with the module and function running them, imported only when the task is selected
+tasks = {'SRO_Cor': ('Modulus.SRO_task', 'SRO_Cor')}
+
+
+# Function to return the function running a task, importing its module
+def task_runner(task):
+    tmodule, tfunc = tasks[task]
+    return getattr(importlib.import_module(tmodule), tfunc)
+
+
 class keywords(object):
 
-    task_name = ['SRO_Cor', "Future_Task"]
+    task_name = list(tasks)
 
     def __init__(self, task):
         if task == 'SRO_Cor':
@@ -24,6 +36,18 @@ class keywords(object):
                         'ConsIndex']
             self.inp_keys_num = len(self.inp_keys)
 
+            # Optional keywords with their default values, appended to the input parameters in this order
+            self.inp_opt_keys = ['Jobs',
+                                 'StagnationIt', 'CostTol', 'DiameterTol', 'MaxEval', 'MaxTime',
+                                 'Verbosity', 'LogEvery', 'OutputFormat', 'Checkpoint', 'Seed',
+                                 'Telemetry', 'Solver', 'Polish', 'WarmStart', 'WarmFrac',
+                                 'DataCache', 'ConsProjection', 'IndependentBest']
+            self.inp_opt_default = [1,
+                                    0, 0.0, 0.0, 0, 0.0,
+                                    2, 1, 'XLSX', 0, None,
+                                    False, 'UAPSO', False, None, 0.25,
+                                    None, False, False]
+
 
 
 
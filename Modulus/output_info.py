@@ -10,11 +10,21 @@
 
 #!/bin/python3
 
+import os
 import sys
+import atexit
 
 class out_write(object):
 
+    # Long-lived buffered handles of the output files, and the logging settings
+    handles = {}
+    inherited = []      # Handles inherited by a forked process, never flushed there as their buffers are the parent's
+    verbosity = 2       # 0: processes, warnings and errors, 1: + info and misc, 2: + iterations
+    log_every = 1       # Writing every log_every iterations, 0: only on improvement of the global best
+    recorded = None     # Warnings recorded for a later replay, if a list
+
     def __init__(self, fileout):
+        out_write.close(fileout)
         fout = open(fileout, "w")
         fout.write('#=============================================================================#\n'
                    '#                                                                             #\n'
@@ -27,35 +37,75 @@ class out_write(object):
                    '#=============================================================================#\n')
         fout.close()
 
+    def handle(fileout):
+        if fileout not in out_write.handles:
+            out_write.handles[fileout] = open(fileout, "a", buffering=65536)
+        return out_write.handles[fileout]
+
+    def settings(verbosity, log_every):
+        out_write.verbosity = verbosity
+        out_write.log_every = log_every
+
+    def log_iter(iit, improved):
+        if out_write.verbosity < 2:
+            return False
+        if out_write.log_every == 0:
+            return improved
+        return (iit + 1) % out_write.log_every == 0
+
+    def flush(fileout):
+        if fileout in out_write.handles:
+            out_write.handles[fileout].flush()
+
+    def close(fileout):
+        if fileout in out_write.handles:
+            out_write.handles.pop(fileout).close()
+
+    def close_all():
+        for fileout in list(out_write.handles):
+            out_write.close(fileout)
+
+    # Function to drop the handles inherited by a forked process, kept referenced so that they are never flushed
+    def forked():
+        out_write.inherited.extend(out_write.handles.values())
+        out_write.handles = {}
+
+    def append(fileout, filename):
+        with open(filename) as fp:
+            out_write.handle(fileout).write(fp.read())
+
     def process_init(fileout, line):
-        fout=open(fileout, "a")
-        fout.write('\n\n ---> ' + line + ' ...\n')
-        fout.close()
+        out_write.handle(fileout).write('\n\n ---> ' + line + ' ...\n')
 
     def process_end(fileout):
-        fout=open(fileout, "a")
-        fout.write('\n\n... DONE <---\n')
-        fout.close()
+        out_write.handle(fileout).write('\n\n... DONE <---\n')
 
     def error(fileout, line):
-        fout=open(fileout, "a")
+        fout = out_write.handle(fileout)
         fout.write('\n ERROR: ' + line)
         fout.write('\n\n Calculation terminated!  BYE BYE!')
+        out_write.close_all()
         sys.exit('\n Calculation terminated!')
 
     def warning(fileout, line):
-        fout=open(fileout, "a")
-        fout.write('\n WARNING: ' + line)
+        if out_write.recorded is not None:
+            out_write.recorded.append(line)
+        out_write.handle(fileout).write('\n WARNING: ' + line)
 
     def info(fileout, line):
-        fout=open(fileout, "a")
-        fout.write('\n INFO: ' + line)
+        if out_write.verbosity >= 1:
+            out_write.handle(fileout).write('\n INFO: ' + line)
 
     def iter(fileout, indentation, case, irun, opt = ''):
-        fout = open(fileout, "a")
-        fout.write('\n ' + ' ' * indentation + case + str(irun) + opt)
+        if out_write.verbosity >= 2:
+            out_write.handle(fileout).write('\n ' + ' ' * indentation + case + str(irun) + opt)
 
     def misc(fileout, indentation, tag, opt = ''):
-        fout = open(fileout, "a")
-        fout.write('\n ' + ' ' * indentation + tag + opt)
+        if out_write.verbosity >= 1:
+            out_write.handle(fileout).write('\n ' + ' ' * indentation + tag + opt)
+
 
+# Flushing the buffered output files on exit, only in the process that opened them
+atexit.register(out_write.close_all)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=out_write.forked)
@@ -0,0 +1,234 @@
+#=============================================================================#
+#                                                                             #
+#                     The optimization results module.                        #
+#                                                                             #
+#-----------------------------------------------------------------------------#
+# This module collects the optimization results at full precision, and        #
+# writes them into XLSX and/or NPZ files.                                     #
+#-----------------------------------------------------------------------------#
+# Original version: March 2022 by Okan K. Orhan                               #
+#=============================================================================#
+
+#!/bin/python3
+
+import sys
+import zipfile
+import numpy as np
+import pandas as pd
+
+
+# Function to collect the invariant information of a UAPSO job as a dictionary of arrays
+def opt_results(inp_par, ext_data, kernel, seed_entropy, num_run=None):
+    if num_run is None:
+        num_run = inp_par[6]
+    results = {}
+    results['system'] = np.array([ext_data['Name'].iloc[0]])
+    results['elements'] = np.array(inp_par[2])
+    results['system_frac'] = np.array(ext_data[inp_par[2]].iloc[0], dtype=float)
+    results['sub_names'] = np.array(kernel.sub_names)
+    results['sub_frac'] = np.array(ext_data[inp_par[2]].iloc[1:], dtype=float)
+    if 'Energy' in ext_data.columns:
+        results['system_energy'] = np.array([ext_data['Energy'].iloc[0]], dtype=float)
+        results['sub_energy'] = np.array(ext_data['Energy'].iloc[1:], dtype=float)
+    results['beta_limits'] = kernel.search_limits
+    results['seed_entropy'] = np.array([str(seed_entropy)])
+    results['run_beta'] = np.zeros((num_run, kernel.num_sub_sys))
+    results['run_cost'] = np.zeros(num_run)
+    if not inp_par[11]:
+        # Weight vectors of a sweep, paired with the objectives in increasing order, and the runs of each vector
+        results['obj_index'] = np.array(sorted(inp_par[10]))
+        results['sweep_weight'] = kernel.obj_weights.copy()
+        results['run_weight'] = np.repeat(np.arange(kernel.obj_weights.shape[0]), num_run // kernel.obj_weights.shape[0])
+    return results
+
+
+# Function to add the global best and its history (if recorded) of a run to the results
+def add_run(results, irun, global_best, history):
+    results['run_beta'][irun] = global_best.beta
+    results['run_cost'][irun] = global_best.cost
+    if history is not None:
+        tkeys = ['hist_run', 'hist_iteration', 'hist_beta', 'hist_cost', 'hist_fom']
+        tvals = [np.full(history.size, irun, dtype=np.int64), history.iteration, history.beta,
+                 history.cost, history.fom]
+        for tkey, tval in zip(tkeys, tvals):
+            if tkey in results:
+                results[tkey] = np.concatenate([results[tkey], tval])
+            else:
+                results[tkey] = tval
+
+
+# Function to add the absolute global best and its figure of merits to the results
+def add_global_best(results, global_best, fom, fom_index):
+    results['beta'] = np.array(global_best.beta, dtype=float)
+    results['cost'] = np.array([global_best.cost], dtype=float)
+    results['fom'] = np.array(fom, dtype=float)
+    results['fom_index'] = np.array(fom_index)
+
+
+# Function to add the best solution of a weight vector of a sweep, with its objectives and figure of merits
+def add_sweep(results, iweight, global_best, obj, fom, fom_index):
+    if 'sweep_beta' not in results:
+        tnum = results['sweep_weight'].shape[0]
+        results['sweep_beta'] = np.zeros((tnum, len(global_best.beta)))
+        results['sweep_cost'] = np.zeros(tnum)
+        results['sweep_obj'] = np.zeros((tnum, len(obj)))
+        results['sweep_fom'] = np.zeros((tnum, len(fom)))
+        results['fom_index'] = np.array(fom_index)
+    results['sweep_beta'][iweight] = global_best.beta
+    results['sweep_cost'][iweight] = global_best.cost
+    results['sweep_obj'][iweight] = obj
+    results['sweep_fom'][iweight] = fom
+
+
+# XLSX output object, keeping a single workbook session open for the whole job
+class xlsx_out:
+
+    def __init__(self, file_name):
+        self.writer = pd.ExcelWriter(file_name, engine='openpyxl')
+
+    # Function to write the main system information on top of the global best sheet
+    def header(self, header):
+        header.to_excel(self.writer, sheet_name='Global best', index=None, float_format="%.4f",
+                        startrow=0, startcol=0)
+
+    # Function to write the global best history of a run
+    def run_history(self, irun, history, iweight=None):
+        tname = 'Beta in run ' + str(irun + 1) + ('' if iweight is None else ' weight ' + str(iweight + 1))
+        history.to_excel(self.writer, sheet_name=tname, startrow=0, float_format="%.4f")
+
+    # Function to write the best solutions of the weight vectors of a sweep
+    def weight_sweep(self, sweep):
+        sweep.to_excel(self.writer, sheet_name='Weight sweep', startrow=0, float_format="%.4f")
+
+    # Function to write the absolute global best and its figure of merits
+    def global_best(self, final_data, fom_final):
+        final_data.to_excel(self.writer, sheet_name='Global best', startrow=3, index=None,
+                            float_format="%.4f")
+        fom_final.to_excel(self.writer, sheet_name='Global best', startrow=final_data.shape[0] + 5,
+                           startcol=0, float_format="%.4f")
+
+    def close(self):
+        self.writer.close()
+
+
+# Function to write the results into an XLSX file
+def write_xlsx(results, file_name):
+    elements = list(results['elements'])
+    xlsx_file = xlsx_out(file_name)
+
+    header = pd.DataFrame([results['system_frac']], columns=elements)
+    header.insert(0, 'System', results['system'])
+    if 'system_energy' in results:
+        header['Energy'] = results['system_energy']
+    xlsx_file.header(header)
+
+    sweep = 'sweep_weight' in results
+    if 'hist_run' in results:
+        hist_run = np.asarray(results['hist_run'])
+        num_run = results['run_cost'].shape[0] // (results['sweep_weight'].shape[0] if sweep else 1)
+        for irun in range(results['run_cost'].shape[0]):
+            tind = np.where(hist_run == irun)[0]
+            tdata = np.concatenate([results['hist_beta'][tind], results['hist_fom'][tind]], axis=1).T
+            history = pd.DataFrame(tdata, index=list(results['sub_names']) + list(results['fom_index']),
+                                   columns=['Ite ' + str(iit + 1) for iit in results['hist_iteration'][tind]])
+            if sweep:
+                xlsx_file.run_history(irun % num_run, history, irun // num_run)
+            else:
+                xlsx_file.run_history(irun, history)
+
+    final_data = pd.DataFrame(results['sub_frac'], columns=elements)
+    final_data.insert(0, 'Sub-system', results['sub_names'])
+    if 'sub_energy' in results:
+        final_data['Energy'] = results['sub_energy']
+    final_data['Beta limits'] = results['beta_limits']
+    if sweep:
+        # Best beta_jm and figure of merits of each weight vector
+        tcols = [str(iweight + 1) for iweight in range(results['sweep_weight'].shape[0])]
+        for iweight in range(len(tcols)):
+            final_data['Beta_jm ' + tcols[iweight]] = results['sweep_beta'][iweight]
+        fom_final = pd.DataFrame(results['sweep_fom'].T, index=list(results['fom_index']),
+                                 columns=['FoM ' + tcol for tcol in tcols])
+        tobj = ['O' + str(tind) for tind in results['obj_index']]
+        sweep_data = pd.DataFrame(np.concatenate([results['sweep_weight'], results['sweep_cost'][:, None],
+                                                  results['sweep_obj']], axis=1).T,
+                                  index=['Weight ' + tname for tname in tobj] + ['Cost'] + tobj,
+                                  columns=['Weight vector ' + tcol for tcol in tcols])
+        xlsx_file.weight_sweep(sweep_data)
+    else:
+        final_data['Beta_jm'] = results['beta']
+        fom_final = pd.Series(results['fom'], name='FoM', index=list(results['fom_index']))
+    xlsx_file.global_best(final_data, fom_final)
+    xlsx_file.close()
+
+
+# Function to write the results into an uncompressed NPZ file, which can be memory mapped
+def write_npz(results, file_name):
+    np.savez(file_name, **results)
+
+
+# Function to load an NPZ file of results, memory mapping its arrays if mmap_mode is given
+def load_npz(file_name, mmap_mode='r'):
+    if mmap_mode is None:
+        with np.load(file_name) as tnpz:
+            return {tkey: tnpz[tkey] for tkey in tnpz.files}
+
+    results = {}
+    with zipfile.ZipFile(file_name) as tzip, open(file_name, 'rb') as fp:
+        for tinfo in tzip.infolist():
+            tkey = tinfo.filename[:-4]
+            with tzip.open(tinfo) as tmember:
+                tversion = np.lib.format.read_magic(tmember)
+                if tversion == (1, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(tmember)
+                else:
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(tmember)
+                theader_size = tmember.tell()
+
+            if tinfo.compress_type != zipfile.ZIP_STORED or dtype.hasobject or 0 in shape:
+                with np.load(file_name) as tnpz:
+                    results[tkey] = tnpz[tkey]
+                continue
+
+            # Offset of the array data, after the local file header of the member
+            fp.seek(tinfo.header_offset + 26)
+            tname_len, textra_len = np.frombuffer(fp.read(4), dtype='<u2')
+            toffset = tinfo.header_offset + 30 + int(tname_len) + int(textra_len) + theader_size
+            results[tkey] = np.memmap(file_name, dtype=dtype, mode=mmap_mode, offset=toffset, shape=shape,
+                                      order='F' if fortran_order else 'C')
+    return results
+
+
+# Function to load the sub-systems and the best beta_jm of a previous job from its XLSX or NPZ file, for warm starts
+def load_results(file_name):
+    prior = {}
+    if file_name.endswith('.npz'):
+        tresults = load_npz(file_name, None)
+        prior['elements'] = list(tresults['elements'])
+        prior['sub_names'] = list(tresults['sub_names'])
+        prior['sub_frac'] = np.array(tresults['sub_frac'], dtype=float)
+        # Global bests of all runs, the absolute global best is one of them
+        prior['beta'] = np.array(tresults['run_beta'], dtype=float)
+    else:
+        tdata = pd.read_excel(file_name, sheet_name='Global best', skiprows=3)
+        tdata = tdata.iloc[:np.argmax(np.append(tdata['Sub-system'].isna().values, True))]
+        tcols = list(tdata.columns)
+        prior['elements'] = tcols[1:tcols.index('Energy' if 'Energy' in tcols else 'Beta limits')]
+        prior['sub_names'] = list(tdata['Sub-system'])
+        prior['sub_frac'] = np.array(tdata[prior['elements']], dtype=float)
+        # Absolute global best, or the best of each weight vector of a sweep
+        prior['beta'] = np.array(tdata.filter(regex=r'^Beta_jm', axis=1), dtype=float).T
+    return prior
+
+
+# Function to export an NPZ file of results into an XLSX file with the same layout as UAPSO
+def export_xlsx(file_name, xlsx_name=None):
+    if xlsx_name is None:
+        xlsx_name = file_name[:-4] + '.xlsx' if file_name.endswith('.npz') else file_name + '.xlsx'
+    write_xlsx(load_npz(file_name), xlsx_name)
+    return xlsx_name
+
+
+if __name__ == '__main__':
+    # Exporting NPZ files of results into XLSX files: python3 -m Modulus.results_info Prefix.npz ...
+    for file_name in sys.argv[1:]:
+        print(file_name + ' --> ' + export_xlsx(file_name))
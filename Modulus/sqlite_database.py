@@ -0,0 +1,144 @@
+#=============================================================================#
+#                                                                             #
+#                     The SQLite database module.                             #
+#                                                                             #
+#-----------------------------------------------------------------------------#
+# This module imports XLSX databases into SQLite files with indexed           #
+# compositions, and queries only the rows and columns needed by a job.        #
+#-----------------------------------------------------------------------------#
+# Original version: March 2022 by Okan K. Orhan                               #
+#=============================================================================#
+
+#!/bin/python3
+
+import os
+import json
+import sqlite3
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+from Modulus.output_info import out_write
+from Modulus.atomic_info import atom
+
+
+# File extensions of the SQLite databases
+sqlite_extensions = ('.db', '.sqlite', '.sqlite3')
+
+# Version of the SQLite layout, resolution of the quantized molar fractions, and the largest number of subsets of
+# the elements looked up one by one
+sqlite_version = 1
+sqlite_scale = 1000
+max_subsets = 4096
+
+# Lower-case tags of the property columns required by the objectives, as searched by raw_data
+obj_tags = {1: ['celldm', 'energy', 'bulk'], 2: ['celldm'], 3: ['valence'], 4: ['electronegativity']}
+
+
+# Function to check whether a database file is an SQLite database
+def is_sqlite(filename):
+    return filename.lower().endswith(sqlite_extensions)
+
+
+# Function to determine the element set and the composition keys of the rows from their molar fractions
+def composition_keys(elements, frac):
+    tkeys = np.rint(np.nan_to_num(frac) * sqlite_scale).astype(np.int64)
+    tsets = []
+    tcomps = []
+    for i in range(tkeys.shape[0]):
+        tind = np.nonzero(tkeys[i])[0]
+        tsets.append(','.join(sorted([elements[j] for j in tind])))
+        tcomps.append(','.join(sorted([elements[j] + ':' + str(tkeys[i, j]) for j in tind])))
+    return tsets, tcomps
+
+
+# Function to import the first sheet of an XLSX database into an SQLite database
+def import_xlsx(xlsx_name, db_name):
+    xlsxfile = pd.ExcelFile(xlsx_name).parse(0)
+    columns = [str(tcol) for tcol in xlsxfile.columns]
+    xlsxfile.columns = columns
+    elements = [tcol for tcol in columns if tcol.strip() in atom().symbol]
+    tsets, tcomps = composition_keys([tcol.strip() for tcol in elements],
+                                     np.array(xlsxfile[elements], dtype=float))
+
+    if os.path.isfile(db_name):
+        os.remove(db_name)
+    with sqlite3.connect(db_name) as con:
+        xlsxfile.insert(0, 'row_id', np.arange(xlsxfile.shape[0]))
+        xlsxfile['_element_set'] = tsets
+        xlsxfile['_composition'] = tcomps
+        xlsxfile.to_sql('systems', con, index=False)
+        con.execute('CREATE INDEX systems_element_set ON systems (_element_set)')
+        con.execute('CREATE INDEX systems_composition ON systems (_composition)')
+        con.execute('CREATE TABLE info (key TEXT PRIMARY KEY, value TEXT)')
+        con.executemany('INSERT INTO info VALUES (?, ?)',
+                        [('version', str(sqlite_version)), ('columns', json.dumps(columns)),
+                         ('elements', json.dumps(elements)), ('source', os.path.basename(xlsx_name))])
+    con.close()
+    return xlsxfile.shape[0], len(elements)
+
+
+# Function to query the main system and its sub-systems with the columns required by ObjIndex, in the layout of
+# the first sheet of an XLSX database
+def query_database(inp_par, fileout):
+    if not os.path.isfile(inp_par[4]):
+        out_write.error(fileout, 'SQLite file not found!')
+    con = sqlite3.connect('file:' + inp_par[4] + '?mode=ro', uri=True)
+    try:
+        tinfo = dict(con.execute('SELECT key, value FROM info').fetchall())
+    except sqlite3.DatabaseError:
+        con.close()
+        out_write.error(fileout, 'Bad SQLite database! Import it with: python3 -m Modulus.sqlite_database')
+    columns = json.loads(tinfo['columns'])
+    elements = json.loads(tinfo['elements'])
+
+    # Columns searched by raw_data: the molar fractions of the elements, names, Bravais indices and properties
+    tcols = [tcol for ttag in inp_par[2] for tcol in columns if ttag in tcol]
+    ttags = ['name', 'bravais'] + [ttag for tind in sorted(inp_par[10]) for ttag in obj_tags[tind]]
+    tcols += [tcol for tcol in columns if any([ttag in tcol.lower() for ttag in ttags])]
+    tcols = [tcol for tcol in columns if tcol in tcols]
+    tselect = 'SELECT ' + ', '.join(['"' + tcol.replace('"', '""') + '"' for tcol in tcols]) + ' FROM systems '
+
+    # Main system by its composition key, the elements of the alloy being those of the element columns
+    telements = [tcol.strip() for tcol in elements]
+    tsym = [ttag for ttag in inp_par[2] if ttag in telements]
+    tfrac = np.array([inp_par[3][inp_par[2].index(ttag)] for ttag in tsym], dtype=float)
+    tcomp = composition_keys(tsym, tfrac[None, :])[1][0]
+    rows = [tr[0] for tr in con.execute('SELECT row_id FROM systems WHERE _composition = ?', (tcomp,))]
+
+    # Sub-systems by their element sets, every subset of the elements of the alloy or every set in the database
+    if 2 ** len(tsym) <= max_subsets:
+        tsets = [','.join(sorted(tsub)) for torder in range(1, len(tsym) + 1)
+                 for tsub in itertools.combinations(tsym, torder)]
+    else:
+        tsets = [tr[0] for tr in con.execute('SELECT DISTINCT _element_set FROM systems')
+                 if 0 < len(tr[0]) and set(tr[0].split(',')) <= set(tsym)]
+    for i in range(0, len(tsets), 500):
+        tpart = tsets[i:i + 500]
+        rows += [tr[0] for tr in con.execute('SELECT row_id FROM systems WHERE _element_set IN ('
+                                             + ', '.join(['?'] * len(tpart)) + ')', tpart)]
+    rows = sorted(set(rows))
+
+    # Fetching the selected rows in the order of the database
+    xlsxfile = pd.DataFrame(columns=tcols)
+    if len(rows) > 0:
+        con.execute('CREATE TEMP TABLE selected (row_id INTEGER PRIMARY KEY)')
+        con.executemany('INSERT INTO selected VALUES (?)', [(tr,) for tr in rows])
+        xlsxfile = pd.read_sql_query(tselect + 'WHERE row_id IN (SELECT row_id FROM selected) ORDER BY row_id',
+                                     con)
+    con.close()
+    return xlsxfile
+
+
+if __name__ == '__main__':
+    # Importing an XLSX database: python3 -m Modulus.sqlite_database Data.xlsx --out Data.db
+    parser = argparse.ArgumentParser(description='Importing an XLSX database into an SQLite database')
+    parser.add_argument('xlsx', help='XLSX database, its first sheet is imported')
+    parser.add_argument('--out', default=None, help='SQLite file name')
+    args = parser.parse_args()
+
+    db_name = args.out if args.out is not None else os.path.splitext(args.xlsx)[0] + '.db'
+    if not is_sqlite(db_name):
+        parser.error('SQLite file name should end with ' + ', '.join(sqlite_extensions))
+    num_rows, num_elements = import_xlsx(args.xlsx, db_name)
+    print(args.xlsx + ' --> ' + db_name + ' : ' + str(num_rows) + ' rows, ' + str(num_elements) + ' elements')
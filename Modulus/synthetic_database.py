@@ -0,0 +1,120 @@
+#=============================================================================#
+#                                                                             #
+#                     The synthetic database module.                          #
+#                                                                             #
+#-----------------------------------------------------------------------------#
+# This module generates reproducible MPES databases of any size, with the     #
+# column conventions of the external database, for stress and scaling tests.  #
+#-----------------------------------------------------------------------------#
+# Original version: March 2022 by Okan K. Orhan                               #
+#=============================================================================#
+
+#!/bin/python3
+
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+
+
+# Principal elements of the synthetic databases, none of them is a part of another column name
+syn_elements = ['Zr', 'Nb', 'Mo', 'Hf', 'Ta', 'W', 'Ti', 'Cr', 'Re', 'Ru', 'Rh', 'Os', 'Ir',
+                'Fe', 'Co', 'Ni', 'Cu', 'Al', 'Mn', 'Pd', 'Pt', 'Ag', 'Au', 'Zn', 'Sc', 'Tc']
+
+# Property columns of the external database
+syn_columns = ['Celldm 1', 'Gibbs free energy', 'Valence electron density', 'Electronegativity',
+               'Bulk modulus', 'Young modulus']
+
+
+# Function to return the principal elements of a synthetic database
+def synthetic_elements(num_elements):
+    if num_elements < 1 or num_elements > len(syn_elements):
+        raise ValueError('Number of elements should be 1 - ' + str(len(syn_elements)) + '!')
+    return syn_elements[:num_elements]
+
+
+# Function to generate a synthetic database of num_elements principal elements
+#   max_order : highest order of the sub-systems (all elements if None), the main system is always included
+#   num_rows  : number of rows, by sampling the equimolar sub-systems or by adding non-equimolar ones (all
+#               equimolar sub-systems if None)
+def synthetic_database(num_elements, max_order=None, num_rows=None, seed=0, ibrav=2):
+    elements = synthetic_elements(num_elements)
+    if max_order is None:
+        max_order = num_elements
+    max_order = min(max_order, num_elements)
+    rng = np.random.default_rng(seed)
+
+    # Equimolar sub-systems in increasing order, and the main system last
+    frac = []
+    for torder in range(1, max_order + 1):
+        for tsub in itertools.combinations(range(num_elements), torder):
+            tfrac = np.zeros(num_elements)
+            tfrac[list(tsub)] = 1.0 / torder
+            frac.append(tfrac)
+    if max_order < num_elements:
+        frac.append(np.full(num_elements, 1.0 / num_elements))
+    frac = np.array(frac)
+
+    if num_rows is not None:
+        if num_rows < 2:
+            raise ValueError('Number of rows should be at least 2!')
+        if num_rows < frac.shape[0]:
+            # Sampling the sub-systems, keeping their order
+            tind = np.sort(rng.choice(frac.shape[0] - 1, num_rows - 1, replace=False))
+            frac = np.concatenate([frac[tind], frac[-1:]])
+        elif num_rows > frac.shape[0]:
+            # Adding non-equimolar sub-systems of random elements
+            tnum = num_rows - frac.shape[0]
+            textra = np.zeros((tnum, num_elements))
+            for i in range(tnum):
+                torder = rng.integers(min(2, max_order), max_order + 1)
+                tsub = rng.choice(num_elements, torder, replace=False)
+                textra[i, tsub] = np.round(0.5 * rng.dirichlet(np.ones(torder)) + 0.5 / torder, 4)
+                textra[i, tsub[-1]] = 1.0 - np.sum(textra[i, tsub[:-1]])
+            frac = np.concatenate([frac[:-1], textra, frac[-1:]])
+
+    # Properties of the elements, mixed by the molar fractions with a random deviation for the alloys
+    tbase = np.stack([rng.uniform(8.2, 9.8, num_elements),
+                      rng.uniform(-8000.0, -1500.0, num_elements),
+                      rng.uniform(0.09, 0.24, num_elements),
+                      rng.uniform(-33.0, -15.0, num_elements),
+                      rng.uniform(200.0, 380.0, num_elements),
+                      rng.uniform(50.0, 200.0, num_elements)], axis=1)
+    tprop = frac @ tbase
+    tmixing = 1.0 - np.max(frac, axis=1)
+    tprop[:, 0] *= 1.0 + 0.02 * tmixing * rng.standard_normal(frac.shape[0])
+    tprop[:, 1] -= 100.0 * tmixing * rng.random(frac.shape[0])
+    tprop[:, 2:4] *= 1.0 + 0.05 * tmixing[:, None] * rng.standard_normal((frac.shape[0], 2))
+    tprop[:, 4:6] *= 1.0 - 0.5 * tmixing[:, None] * rng.random((frac.shape[0], 2))
+
+    names = [''.join([elements[j] for j in np.nonzero(frac[i])[0]]) + '-Y' for i in range(frac.shape[0])]
+    data = pd.DataFrame(frac, columns=elements)
+    data.insert(0, 'Bravais index', ibrav)
+    data.insert(0, 'Name', names)
+    for j in range(len(syn_columns)):
+        data[syn_columns[j]] = tprop[:, j]
+    return data
+
+
+# Function to write a synthetic database into an XLSX file
+def write_database(data, file_name):
+    data.to_excel(file_name, index=None)
+
+
+if __name__ == '__main__':
+    # Generating a synthetic database: python3 -m Modulus.synthetic_database 10 --order 4 --rows 1000 --out Syn.xlsx
+    parser = argparse.ArgumentParser(description='Synthetic MPES database generator')
+    parser.add_argument('elements', type=int, help='Number of principal elements')
+    parser.add_argument('--order', type=int, default=None, help='Highest order of the sub-systems')
+    parser.add_argument('--rows', type=int, default=None, help='Number of rows')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the random properties')
+    parser.add_argument('--out', default=None, help='XLSX file name')
+    args = parser.parse_args()
+
+    data = synthetic_database(args.elements, args.order, args.rows, args.seed)
+    file_name = args.out if args.out is not None else 'Synthetic-' + str(args.elements) + '.xlsx'
+    write_database(data, file_name)
+    elements = synthetic_elements(args.elements)
+    print(file_name + ' : ' + str(data.shape[0]) + ' rows')
+    print('Elements = ' + ', '.join(elements))
+    print('MolarFrac = ' + ', '.join(['%.5f' % (1.0 / len(elements))] * len(elements)))
@@ -0,0 +1,132 @@
+#=============================================================================#
+#                                                                             #
+#                     The telemetry module.                                   #
+#                                                                             #
+#-----------------------------------------------------------------------------#
+# This module times the phases of a job, collects the optimizer statistics    #
+# of the runs, and writes a JSON-lines trace of the iterations.               #
+#-----------------------------------------------------------------------------#
+# Original version: March 2022 by Okan K. Orhan                               #
+#=============================================================================#
+
+#!/bin/python3
+
+import json
+import atexit
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from Modulus.output_info import out_write
+
+
+class telemetry(object):
+
+    # Wall times of the phases, statistics of the runs and the trace file, collected only if enabled
+    enabled = False
+    phases = {}         # Phase name --> [wall time (s), number of calls]
+    runs = []           # Statistics of the completed runs
+    workers = False     # Whether runs were merged from worker processes
+    file_trace = None
+    trace_handle = None
+
+    def settings(enabled, file_trace=None, mode="w"):
+        telemetry.close()
+        telemetry.enabled = enabled
+        telemetry.phases = {}
+        telemetry.runs = []
+        telemetry.workers = False
+        telemetry.file_trace = file_trace
+        if enabled and file_trace is not None:
+            # Line buffered, so that the trace can be followed while the job runs
+            telemetry.trace_handle = open(file_trace, mode, buffering=1)
+
+    def close():
+        if telemetry.trace_handle is not None:
+            telemetry.trace_handle.close()
+            telemetry.trace_handle = None
+
+    # Function to add the wall time of a phase
+    def add(name, seconds, count=1):
+        if telemetry.enabled:
+            tphase = telemetry.phases.setdefault(name, [0.0, 0])
+            tphase[0] += seconds
+            tphase[1] += count
+
+    # Function to record the statistics of a completed run
+    def run_end(irun, num_iter, num_eval, num_improved, seconds, reason):
+        if telemetry.enabled:
+            telemetry.runs.append({'run': irun + 1, 'iterations': num_iter, 'evaluations': num_eval,
+                                   'improvements': num_improved, 'seconds': seconds,
+                                   'evals_per_second': num_eval / seconds if seconds > 0 else 0.0,
+                                   'termination': reason})
+
+    # Function to write the convergence metrics of an iteration into the trace
+    def trace(irun, iit, seconds, num_eval, global_best_cost, cost, diameter, improved, stagnation):
+        if telemetry.trace_handle is not None:
+            telemetry.trace_handle.write(json.dumps({'run': irun + 1, 'iteration': iit + 1, 'time': seconds,
+                                                     'evaluations': num_eval, 'global_best': float(global_best_cost),
+                                                     'swarm_best': float(cost.min()),
+                                                     'swarm_mean': float(cost.mean()),
+                                                     'diameter': float(diameter), 'improved': bool(improved),
+                                                     'stagnation': stagnation}) + '\n')
+
+    # Function to collect the telemetry of a worker process
+    def collect():
+        return telemetry.phases, telemetry.runs
+
+    # Function to merge the telemetry of a worker process
+    def merge(state):
+        tphases, truns = state
+        telemetry.workers = True
+        for name, (seconds, count) in tphases.items():
+            telemetry.add(name, seconds, count)
+        if telemetry.enabled:
+            telemetry.runs.extend(truns)
+
+    # Function to write the summary tables into the output file
+    def summary(fileout):
+        if not telemetry.enabled:
+            return
+        fout = out_write.handle(fileout)
+        fout.write('\n\n ---> Telemetry summary ...\n')
+
+        fout.write('\n  %-36s %12s %8s %10s' % ('Phase', 'Wall time/s', 'Calls', 'Share/%'))
+        ttotal = telemetry.phases['Total'][0] if 'Total' in telemetry.phases else 0.0
+        for name, (seconds, count) in telemetry.phases.items():
+            fout.write('\n  %-36s %12.4f %8d %10.2f' % (name, seconds, count,
+                                                         100.0 * seconds / ttotal if ttotal > 0 else 0.0))
+        fout.write('\n  (The phases of the runs are included in the optimization runs, and are summed over the'
+                   '\n   processes of parallel runs; the optimization runs are included in UAPSO)')
+
+        if len(telemetry.runs) > 0:
+            fout.write('\n\n  %-6s %10s %12s %12s %12s %14s  %s' % ('Run', 'Iterations', 'Evaluations',
+                                                                 'Improvements', 'Wall time/s', 'Evaluations/s',
+                                                                 'Termination'))
+            for trun in sorted(telemetry.runs, key=lambda tr: tr['run']):
+                fout.write('\n  %-6d %10d %12d %12d %12.4f %14.1f  %s' % (
+                    trun['run'], trun['iterations'], trun['evaluations'], trun['improvements'], trun['seconds'],
+                    trun['evals_per_second'], trun['termination']))
+            tnum_eval = sum([trun['evaluations'] for trun in telemetry.runs])
+            tseconds = sum([trun['seconds'] for trun in telemetry.runs])
+            fout.write('\n  %-6s %10d %12d %12d %12.4f %14.1f' % (
+                'Total', sum([trun['iterations'] for trun in telemetry.runs]), tnum_eval,
+                sum([trun['improvements'] for trun in telemetry.runs]), tseconds,
+                tnum_eval / tseconds if tseconds > 0 else 0.0))
+
+        if resource is not None:
+            # Peak resident set sizes, in kB on Linux
+            fout.write('\n\n  Peak memory of the main process     : %.1f MB'
+                       % (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0))
+            # Only if the runs were done by worker processes (Jobs > 1), other child processes not being relevant
+            tchildren = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+            if telemetry.workers and tchildren > 0:
+                fout.write('\n  Peak memory of the child processes  : %.1f MB' % (tchildren / 1024.0))
+        if telemetry.file_trace is not None:
+            fout.write('\n  Iteration trace                     : ' + telemetry.file_trace)
+        fout.write('\n\n... DONE <---\n')
+
+
+# Closing the trace file on exit
+atexit.register(telemetry.close)
@@ -0,0 +1,248 @@
+#=============================================================================#
+#                                                                             #
+#                         Benchmark routine of AFMDE                          #
+#                                                                             #
+#-----------------------------------------------------------------------------#
+# This routine times the stages of the short-ranged order correction on the   #
+# reference database and on synthetic databases of growing size.              #
+#-----------------------------------------------------------------------------#
+# Original version: March 2022 by Okan K. Orhan                               #
+#=============================================================================#
+
+#!/bin/python3
+
+
+# Libraries
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+import numpy as np
+import pandas as pd
+
+from Modulus.initialisation import input_check
+from Modulus.output_info import out_write
+from Modulus.external_database import read_database, raw_data, cached_raw_data, composition_index
+from Modulus.SRO_UAPSO import objectives, constraints, swarm, opt_sol, UAPSO_run
+from Modulus.SRO_kernel import obj_kernel
+from Modulus.bravais_lattice_info import bravais_volume
+from Modulus.results_info import opt_results, add_run, add_global_best, write_xlsx
+from Modulus.synthetic_database import synthetic_elements, synthetic_database, write_database
+
+
+# Reference database of the SRO correction
+ref_database = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Work', 'SRO_Correction',
+                            'RHEA_CN_FP_Database.xlsx')
+ref_elements = ['Zr', 'Nb', 'Mo', 'Hf', 'Ta', 'W']
+
+# Startup budget of an input check dry run (main.py --check-input), including the interpreter start
+startup_budget = 0.25
+# Modules that an input check dry run should not import
+heavy_modules = ['numpy', 'pandas', 'openpyxl', 'scipy']
+
+
+# Function to return the best wall time of repeated calls
+def timer(func, repeat=3):
+    tbest = np.inf
+    for i in range(repeat):
+        tstart = time.perf_counter()
+        func()
+        tbest = min(tbest, time.perf_counter() - tstart)
+    return tbest
+
+
+# Function to write an SRO_Cor input file for the benchmarks
+def bench_input(work_dir, prefix, elements, xlsx_file, obj_index, max_it, pop_size):
+    fileinp = os.path.join(work_dir, prefix + '.in')
+    with open(fileinp, 'w') as fp:
+        fp.write('& TaskInfo\n'
+                 'Task = SRO_Cor\n'
+                 'Prefix = ' + prefix + '\n'
+                 'Elements = ' + ', '.join(elements) + '\n'
+                 'MolarFrac = ' + ', '.join(['%.5f' % (1.0 / len(elements))] * len(elements)) + '\n'
+                 '& FilesInfo\n'
+                 'XLSXFile = ' + xlsx_file + '\n'
+                 'Units = eV, Bohr, GPa\n'
+                 '& OptimizationInfo\n'
+                 'MaxRun = 1\n'
+                 'MaxIt = ' + str(max_it) + '\n'
+                 'PopSize = ' + str(pop_size) + '\n'
+                 'OptHistory = T\n'
+                 'ObjIndex = ' + ', '.join([str(tind) for tind in obj_index]) + '\n'
+                 'FixedObjWeight = T\n'
+                 'ObjWeight = ' + ', '.join(['%.4f' % (1.0 / len(obj_index))] * (len(obj_index) - 1)
+                                            + ['%.4f' % (1.0 - (len(obj_index) - 1) * round(1.0 / len(obj_index), 4))]) + '\n'
+                 'ConsIndex = 1, 2\n'
+                 'StagnationIt = 0\n'
+                 'Verbosity = 1\n'
+                 'Seed = 2022\n')
+    return fileinp
+
+
+# Function to benchmark a database for all objective indices
+def bench_database(records, work_dir, case, elements, xlsx_file, xlsxfile, pop_size, max_it, batch_size):
+    fileout = os.path.join(work_dir, case + '.out')
+    out_write(fileout)
+
+    for obj_index in [[1], [2], [3], [4], [1, 2, 3, 4]]:
+        tobj = ','.join([str(tind) for tind in obj_index])
+        fileinp = bench_input(work_dir, 'bench-O' + tobj.replace(',', ''), elements, xlsx_file, obj_index,
+                              max_it, pop_size)
+        inp_par = input_check(fileinp, fileout)
+        out_write.settings(inp_par[20], inp_par[21])
+        ext_data = raw_data(inp_par, fileout, xlsxfile)
+        num_sub_sys = ext_data.shape[0] - 1
+        beta_limits = constraints(inp_par, ext_data)
+        kernel = obj_kernel(fileout, inp_par, ext_data, beta_limits)
+        beta_matrix = np.random.default_rng(0).random((batch_size, num_sub_sys)) * beta_limits
+
+        def record(name, seconds, num_eval=None):
+            trecord = {'name': name, 'case': case, 'obj_index': tobj, 'num_sub_sys': num_sub_sys,
+                       'seconds': seconds}
+            if num_eval is not None:
+                trecord['evals_per_second'] = num_eval / seconds
+            records.append(trecord)
+            print('%-22s %-14s O%-8s %6d sub-systems %12.6f s' % (name, case, tobj, num_sub_sys, seconds)
+                  + ('  %14.1f eval/s' % trecord['evals_per_second'] if num_eval is not None else ''))
+
+        # Input parsing and the selection of the relevant systems
+        record('input_check', timer(lambda: input_check(fileinp, fileout)))
+        record('composition_index', timer(lambda: composition_index(xlsxfile, elements), 1))
+        record('raw_data', timer(lambda: raw_data(inp_par, fileout, xlsxfile)))
+        tinp_par = list(inp_par)
+        tinp_par[30] = os.path.join(work_dir, 'cache')
+        cached_raw_data(tinp_par, fileout, xlsxfile)
+        record('raw_data_cached', timer(lambda: cached_raw_data(tinp_par, fileout)))
+
+        # Volumes of the systems and the objective kernel built from them
+        tcelldm = ext_data.filter(regex=r'^Celldm', axis=1)
+        if tcelldm.shape[1] > 0:
+            record('bravais_volume', timer(lambda: bravais_volume(fileout, ext_data['Bravais'], tcelldm)))
+        record('obj_kernel', timer(lambda: obj_kernel(fileout, inp_par, ext_data, beta_limits)))
+
+        # Single and batched objective evaluations
+        tnum = 20
+        record('objectives_reference', timer(lambda: [objectives(fileout, beta_matrix[i], inp_par, ext_data)
+                                                      for i in range(tnum)], 1), tnum)
+        record('objectives_kernel', timer(lambda: [kernel.objectives(beta_matrix[i])
+                                                   for i in range(batch_size)]), batch_size)
+        record('cost_batch', timer(lambda: kernel.cost_batch(beta_matrix), 10), batch_size)
+
+        # A single iteration and a full run of UAPSO
+        rng = np.random.default_rng(0)
+        uapso_swarm = swarm(inp_par, kernel, np.random.SeedSequence(0))
+        global_best = opt_sol()
+        uapso_swarm.update_global_best(global_best)
+        record('uapso_iteration', timer(lambda: uapso_swarm.update(inp_par, kernel, global_best, 0, rng), 10),
+               pop_size)
+        run_result = []
+        trun = timer(lambda: run_result.append(UAPSO_run(fileout, inp_par, kernel, 0, np.random.SeedSequence(0))), 1)
+        record('uapso_run', trun, (max_it + 2) * pop_size)
+
+        # XLSX output of the run
+        results = opt_results(inp_par, ext_data, kernel, 0)
+        add_run(results, 0, run_result[0][0], run_result[0][1])
+        tfom, tindex = kernel.fig_of_merit(run_result[0][0].beta)
+        add_global_best(results, run_result[0][0], tfom, tindex)
+        record('write_xlsx', timer(lambda: write_xlsx(results, inp_par[1] + '.xlsx'), 1))
+
+    out_write.close_all()
+
+
+# Function to benchmark the startup of an input check dry run in a fresh interpreter
+def bench_startup(records, work_dir, repeat=5):
+    fileinp = bench_input(work_dir, 'bench-start', ref_elements, ref_database, [1, 2, 3, 4], 100, 100)
+    tcommand = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py'),
+                fileinp, os.path.join(work_dir, 'bench-start.out'), '--check-input']
+    tseconds = timer(lambda: subprocess.run(tcommand, check=True), repeat)
+
+    # Top-level packages imported by the dry run, from the import times of the interpreter
+    timport = subprocess.run([sys.executable, '-X', 'importtime'] + tcommand[1:], capture_output=True, text=True)
+    tmodules = set([tline.split('|')[-1].strip().split('.')[0] for tline in timport.stderr.splitlines()
+                    if tline.startswith('import time:') and '|' in tline])
+    theavy = [tmodule for tmodule in heavy_modules if tmodule in tmodules]
+
+    records.append({'name': 'check_input_startup', 'case': 'reference', 'obj_index': '1,2,3,4',
+                    'num_sub_sys': 0, 'seconds': tseconds, 'budget': startup_budget,
+                    'heavy_imports': theavy})
+    print('%-22s %-14s %12.6f s  budget %.3f s %s%s' % ('check_input_startup', 'reference', tseconds,
+                                                         startup_budget,
+                                                         'OK' if tseconds <= startup_budget else 'EXCEEDED',
+                                                         ', imports ' + ', '.join(theavy) if theavy else ''))
+
+
+# Function to compare the evaluations per second with a previous benchmark file
+def bench_compare(records, file_name):
+    with open(file_name) as fp:
+        old_records = json.load(fp)['records']
+    told = {(tr['name'], tr['case'], tr['obj_index']): tr for tr in old_records}
+    print('\n%-22s %-14s %-10s %10s' % ('Benchmark', 'Case', 'ObjIndex', 'Speed-up'))
+    for tr in records:
+        tkey = (tr['name'], tr['case'], tr['obj_index'])
+        if tkey in told:
+            print('%-22s %-14s %-10s %10.2f' % (tr['name'], tr['case'], tr['obj_index'],
+                                                told[tkey]['seconds'] / tr['seconds']))
+
+
+if __name__ == '__main__':
+
+    # Arguments for executable
+    parser = argparse.ArgumentParser(description='A Fair Materials Discovery Engine (AFMDE) benchmarks')
+    parser.add_argument('--out', default='benchmark.json', help='JSON file of the benchmark results')
+    parser.add_argument('--compare', default=None, help='Previous JSON file to compare with')
+    parser.add_argument('--elements', type=int, nargs='*', default=[6, 8, 10],
+                        help='Numbers of elements of the synthetic databases')
+    parser.add_argument('--order', type=int, default=None,
+                        help='Highest order of the sub-systems of the synthetic databases')
+    parser.add_argument('--rows', type=int, default=None, help='Number of rows of the synthetic databases')
+    parser.add_argument('--pop-size', type=int, default=100, help='Population size of the swarm')
+    parser.add_argument('--max-it', type=int, default=200, help='Iterations of the full UAPSO run')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Number of beta vectors per batch')
+    parser.add_argument('--work-dir', default=None, help='Directory to keep the benchmark files, temporary if not given')
+    args = parser.parse_args()
+    file_json = os.path.abspath(args.out)
+    file_compare = os.path.abspath(args.compare) if args.compare is not None else None
+
+    records = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        if args.work_dir is not None:
+            os.makedirs(args.work_dir, exist_ok=True)
+            work_dir = args.work_dir
+        # Prefixes of the benchmark inputs are relative to the working directory
+        os.chdir(work_dir)
+        # Startup of the input check dry run
+        bench_startup(records, work_dir)
+
+        # Reference database
+        tstart = time.perf_counter()
+        xlsxfile = read_database(ref_database, os.path.join(work_dir, 'read.out'))
+        records.append({'name': 'read_database', 'case': 'reference', 'obj_index': '',
+                        'num_sub_sys': xlsxfile.shape[0], 'seconds': time.perf_counter() - tstart})
+        bench_database(records, work_dir, 'reference', ref_elements, ref_database, xlsxfile,
+                       args.pop_size, args.max_it, args.batch_size)
+
+        # Synthetic databases with growing numbers of sub-systems
+        for num_elem in args.elements:
+            xlsxfile = synthetic_database(num_elem, args.order, args.rows, seed=2022)
+            xlsx_file = os.path.join(work_dir, 'synthetic-' + str(num_elem) + '.xlsx')
+            write_database(xlsxfile, xlsx_file)
+            bench_database(records, work_dir, 'synthetic-' + str(num_elem), synthetic_elements(num_elem), xlsx_file,
+                           xlsxfile, args.pop_size, args.max_it, args.batch_size)
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    with open(file_json, 'w') as fp:
+        json.dump({'commit': commit, 'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                   'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+                   'args': vars(args), 'records': records}, fp, indent=1)
+    print('\nBenchmark results are written in ' + file_json)
+
+    if file_compare is not None:
+        bench_compare(records, file_compare)
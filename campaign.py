@@ -0,0 +1,132 @@
+#=============================================================================#
+#                                                                             #
+#                         Campaign routine of AFMDE                           #
+#                                                                             #
+#-----------------------------------------------------------------------------#
+# This routine runs many input files against shared, parsed databases.        #
+#-----------------------------------------------------------------------------#
+# Original version: March 2022 by Okan K. Orhan                               #
+#=============================================================================#
+
+#!/bin/python3
+
+
+# Libraries
+import os
+import sys
+import time
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from Modulus.initialisation import input_check
+from Modulus.input_info import task_runner
+from Modulus.output_info import out_write
+from Modulus.telemetry_info import telemetry
+
+
+# Parsed databases shared by the worker processes
+databases = {}
+
+
+# Function to share the parsed databases with a worker process
+def campaign_init(tdatabases):
+    databases.update(tdatabases)
+
+
+# Function to run a single job of the campaign, after its input file is checked
+def campaign_job(fileout, inp_par):
+    tstart_job = time.perf_counter()
+    out_write.settings(inp_par[20], inp_par[21])
+    telemetry.settings(inp_par[25], inp_par[1] + '.trace.jsonl' if inp_par[25] else None)
+    # Importing the modules of the task, and running it on the shared database
+    tstart = time.perf_counter()
+    task = task_runner(inp_par[0])
+    telemetry.add('Task modules import', time.perf_counter() - tstart)
+    task(fileout, inp_par, False, databases.get(os.path.abspath(inp_par[4])))
+    telemetry.add('Total', time.perf_counter() - tstart_job)
+    telemetry.summary(fileout)
+    telemetry.close()
+    out_write.close(fileout)
+    return fileout
+
+
+# Function to estimate the cost of a job for the longest-job-first ordering
+def campaign_job_size(inp_par):
+    return inp_par[6] * inp_par[7] * inp_par[8]
+
+
+if __name__ == '__main__':
+
+    # Arguments for executable
+    parser = argparse.ArgumentParser(description='A Fair Materials Discovery Engine (AFMDE) campaign')
+    parser.add_argument('fileinp', nargs='+', help='Input files or glob patterns, e.g. "Work/*.in"')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+                        help='Number of worker processes for the jobs')
+    args = parser.parse_args()
+
+    file_list = []
+    for tpattern in args.fileinp:
+        for tfile in sorted(glob.glob(tpattern)) or [tpattern]:
+            if tfile not in file_list:
+                file_list.append(tfile)
+
+    # Checking the input files, each job writes its output next to its input file
+    jobs = []
+    for fileinp in file_list:
+        fileout = os.path.splitext(fileinp)[0] + '.out'
+        out_write(fileout)
+        out_write.process_init(fileout, 'Checking the input file')
+        try:
+            inp_par = input_check(fileinp, fileout)
+        except SystemExit:
+            print('FAILED  : ' + fileinp + ' (see ' + fileout + ')')
+            continue
+        out_write.process_end(fileout)
+        out_write.close(fileout)
+        # The runs of a job are serial, the campaign is parallel over jobs
+        inp_par[14] = 1
+        jobs.append((fileinp, fileout, inp_par))
+
+    # Parsing each distinct database only once, unless the relevant systems of a job are cached
+    from Modulus.external_database import read_database, cache_file
+    from Modulus.sqlite_database import is_sqlite
+    tdatabases = {}
+    for fileinp, fileout, inp_par in list(jobs):
+        tkey = os.path.abspath(inp_par[4])
+        # SQLite databases are queried by each job
+        if is_sqlite(inp_par[4]):
+            continue
+        if inp_par[30] is not None and tkey not in tdatabases:
+            try:
+                if os.path.isfile(cache_file(inp_par, fileout)):
+                    continue
+            except SystemExit:
+                tdatabases[tkey] = None
+            out_write.close(fileout)
+        if tkey not in tdatabases:
+            try:
+                tdatabases[tkey] = read_database(inp_par[4], fileout)
+            except SystemExit:
+                tdatabases[tkey] = None
+            out_write.close(fileout)
+        if tdatabases[tkey] is None:
+            print('FAILED  : ' + fileinp + ' (see ' + fileout + ')')
+            jobs.remove((fileinp, fileout, inp_par))
+    tdatabases = {tkey: tdata for tkey, tdata in tdatabases.items() if tdata is not None}
+
+    # Scheduling the jobs with the longest job first
+    jobs.sort(key=lambda tjob: campaign_job_size(tjob[2]), reverse=True)
+    num_jobs = max(1, min(args.jobs, len(jobs)))
+    with ProcessPoolExecutor(max_workers=num_jobs, initializer=campaign_init,
+                             initargs=(tdatabases,)) as pool:
+        futures = [(fileinp, fileout, pool.submit(campaign_job, fileout, inp_par))
+                   for fileinp, fileout, inp_par in jobs]
+        num_failed = 0
+        for fileinp, fileout, future in futures:
+            try:
+                print('DONE    : ' + fileinp + ' --> ' + future.result())
+            except BaseException:
+                num_failed += 1
+                print('FAILED  : ' + fileinp + ' (see ' + fileout + ')')
+
+    sys.exit(1 if num_failed or len(jobs) < len(file_list) else 0)
@@ -11,43 +11,62 @@
 #!/bin/python3
 
 
-# Libraries
+# Libraries, the modules of the tasks are imported only when selected
+import os
 import sys
+import time
+import argparse
 from Modulus.initialisation import input_check
+from Modulus.input_info import task_runner
 from Modulus.output_info import out_write
-
-# Arguments for executable
-fexe, fileinp, fileout=sys.argv
-
-# Writing header in output file
-out_write(fileout)
-
-# Checking the input file and collecting input parameters
-out_write.process_init(fileout, 'Checking the input file')
-inp_par = input_check(fileinp, fileout)
-out_write.process_end(fileout)
-
-if inp_par[0] == 'SRO_Cor':
-    from Modulus.external_database import raw_data
-    from Modulus.SRO_UAPSO import UAPSO
-
-    # Reading the XLS file
-    out_write.process_init(fileout,'Checking the XLSX file for short-ranged order correction')
-    ext_data = raw_data(inp_par, fileout)
-    out_write.process_end(fileout)
-
-    # Performing UAPSO
-    out_write.process_init(fileout,'Running the unique adaptive particle-swarm optimization (UAPSO)')
-    UAPSO(fileout, inp_par, ext_data)
+from Modulus.telemetry_info import telemetry
+
+
+if __name__ == '__main__':
+
+    # Arguments for executable
+    parser = argparse.ArgumentParser(description='A Fair Materials Discovery Engine (AFMDE)')
+    parser.add_argument('fileinp', help='Input file')
+    parser.add_argument('fileout', help='Output file')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Number of processes for independent optimization runs (overrides Jobs)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue from the checkpoints of an interrupted job (see Checkpoint)')
+    parser.add_argument('--check-input', action='store_true',
+                        help='Only check the input file, without importing the modules of the task')
+    args = parser.parse_args()
+    fileinp, fileout = args.fileinp, args.fileout
+
+    # Writing header in output file
+    tstart_job = time.perf_counter()
+    out_write(fileout)
+
+    # Checking the input file and collecting input parameters
+    out_write.process_init(fileout, 'Checking the input file')
+    inp_par = input_check(fileinp, fileout)
+    if args.jobs is not None:
+        if args.jobs <= 0:
+            out_write.error(fileout, 'Bad Jobs number!')
+        inp_par[14] = args.jobs
+    out_write.settings(inp_par[20], inp_par[21])
+
+    # Dry run, checking the input file and the existence of its files only
+    if args.check_input:
+        if not os.path.isfile(inp_par[4]):
+            out_write.error(fileout, 'XLSX file not found!')
+        out_write.info(fileout, 'Input file checked in %.1f ms' % (1.0e3 * (time.perf_counter() - tstart_job)))
+        out_write.process_end(fileout)
+        sys.exit(0)
+    telemetry.settings(inp_par[25], inp_par[1] + '.trace.jsonl' if inp_par[25] else None)
+    telemetry.add('Input check', time.perf_counter() - tstart_job)
     out_write.process_end(fileout)
 
+    # Importing the modules of the task, and running it
+    tstart = time.perf_counter()
+    task = task_runner(inp_par[0])
+    telemetry.add('Task modules import', time.perf_counter() - tstart)
+    task(fileout, inp_par, args.resume)
 
-
-
-
-
-
-
-
-
-
+    # Writing the wall times of the phases and the statistics of the runs, if Telemetry = T
+    telemetry.add('Total', time.perf_counter() - tstart_job)
+    telemetry.summary(fileout)